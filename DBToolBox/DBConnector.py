@@ -1,9 +1,38 @@
 """A wrapper class around SQLAlchemy to make general database operations easier to write"""
 import os
-import psycopg2
+import threading
+import uuid
+from contextlib import nullcontext
+from itertools import chain, islice
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import dotenv_values
-from sqlalchemy import create_engine
+from sqlalchemy import column, create_engine, inspect, table as table_clause, text
+from DBToolBox.bulk import (
+    copy_rows,
+    execute_pages,
+    iter_rows,
+    qualified_name,
+    quote_identifier,
+    resolve_insert_method,
+    supports_copy,
+)
+from DBToolBox.cache import referenced_tables
+from DBToolBox.EDA import FrameCompactor, compact_frame
+from DBToolBox.incremental import IncrementalReader
+from DBToolBox.instrumentation import Instrumentation
+from DBToolBox.memory import MemoryBudget, coalesce_chunks
+from DBToolBox.pooling import PoolMonitor, pool_options
+from DBToolBox.transfer import (
+    EXPORT_FORMATS,
+    copy_from_csv,
+    copy_to_csv,
+    file_format,
+    iter_file_chunks,
+    source_query,
+    write_csv,
+    write_parquet,
+)
 
 
 def _validate_config(config: dict) -> bool:
@@ -14,15 +43,87 @@ def _validate_config(config: dict) -> bool:
     return REQUIRED.issubset(set(config))
 
 
-class DataConnector:
+def _partition_bounds(lower, upper, num_partitions: int) -> list:
+    """
+    Returns the @num_partitions - 1 inner boundaries that split the range
+    [@lower, @upper] into equal strides. Works for numbers and datetimes.
+    """
+    if isinstance(lower, int) and isinstance(upper, int):
+        return [
+            lower + (upper - lower) * i // num_partitions
+            for i in range(1, num_partitions)
+        ]
+    return [lower + (upper - lower) * i / num_partitions for i in range(1, num_partitions)]
+
+
+def _begin_ddl(conn) -> None:
+    """
+    Makes the DDL run on @conn part of its transaction. pysqlite runs DDL
+    outside of a transaction unless one is already open, so one is opened
+    explicitly on SQLite.
+    """
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN")
+
+
+def _bind_value(value):
+    """Converts pandas/numpy scalars (e.g. pd.Timestamp, np.int64) to Python values"""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+
+def _partition_predicates(column: str, bounds: list) -> list:
+    """
+    Returns a (where clause, params) pair for each partition defined by
+    @bounds. Like Spark's JDBC partitioned reads, the first partition is
+    unbounded below and also holds NULLs, and the last is unbounded above,
+    so every row is read exactly once.
+    """
+    if not bounds:
+        return [("1 = 1", {})]
+    column = quote_identifier(column)
+    predicates = [(f"{column} < :_dbc_upper OR {column} IS NULL", {"_dbc_upper": bounds[0]})]
+    for low, high in zip(bounds, bounds[1:]):
+        predicates.append(
+            (
+                f"{column} >= :_dbc_lower AND {column} < :_dbc_upper",
+                {"_dbc_lower": low, "_dbc_upper": high},
+            )
+        )
+    predicates.append((f"{column} >= :_dbc_lower", {"_dbc_lower": bounds[-1]}))
+    return predicates
+
+
+def _convert_columns(df: pd.DataFrame, converters: dict = None) -> pd.DataFrame:
+    """Returns the DataFrame with each converter applied to its whole column"""
+    if not converters:
+        return df
+    return df.assign(**{col: func(df[col]) for col, func in converters.items()})
+
 
-    default_config = dotenv_values(".env")
+def _iter_shards(data, num_shards: int, shard_size: int = None):
+    """
+    Splits a DataFrame into @num_shards (or @shard_size-row) shards.
+    Any other iterable is assumed to already yield DataFrame chunks.
+    """
+    if not isinstance(data, pd.DataFrame):
+        yield from data
+        return
+    if shard_size is None:
+        shard_size = max(-(-len(data) // num_shards), 1)
+    for start in range(0, max(len(data), 1), shard_size):
+        yield data.iloc[start : start + shard_size]
+
+
+class DataConnector:
 
     def __init__(
         self, 
-        config: dict = default_config, 
+        config: dict = None, 
         use_env = False, 
-        no_eng = False
+        no_eng = False,
+        cache = None
         ):
         """
         Description:
@@ -41,10 +142,19 @@ class DataConnector:
             DBC_DB: Database name
             DBC_DIALECT: The name of the RDBMS (e.g. Postgresql, MySQL, SQLServer, etc.)
             DBC_DRIVER: The database driver being used (e.g. psycopg2)
+
+        Connection pooling can optionally be tuned with the following variables:
+            DBC_POOL_SIZE: Number of connections kept open in the pool
+            DBC_MAX_OVERFLOW: Number of extra connections allowed beyond the pool size
+            DBC_POOL_TIMEOUT: Seconds to wait for a connection before giving up
+            DBC_POOL_RECYCLE: Seconds after which a connection is replaced
+            DBC_POOL_PRE_PING: Test connections for liveness on checkout (true/false)
+            DBC_POOL_USE_LIFO: Reuse the most recently returned connection first (true/false)
         
-        By default, the initialization method checks for a file in the root directory
-        called ".env". If it finds that file, then it will validate it to ensure the 
-        required parameters are supplied and will use it to start the database engine.
+        By default, the initialization method checks for a file in the working directory
+        called ".env" (read when the DataConnector is created). If it finds that file, then
+        it will validate it to ensure the required parameters are supplied and will use it
+        to start the database engine.
 
         To use system environment variables, set `use_env=True` (it is False by default).
         If both a configuration and environment variables are set, then all of those
@@ -52,6 +162,10 @@ class DataConnector:
 
         You can also specify whether the initialization process starts an engine
         or not using the `no_eng` flag should you desire to do so.
+
+        Query results can be cached by passing a `QueryCache` (see DBToolBox.cache)
+        as `cache`. Inserts through the DataConnector invalidate the cached results
+        of the tables they write to.
         
         Usage:
         
@@ -70,7 +184,7 @@ class DataConnector:
         # Initializing without starting the database engine
         dc = DataConnector(no_eng=True)
         """
-        conf = config
+        conf = dotenv_values(".env") if config is None else config
         # Throw an error if there is no configuration either in .env or the environment
         if not conf:
             if not use_env:
@@ -87,6 +201,8 @@ class DataConnector:
             raise (KeyError)
         # Set the configuration
         self.config = conf
+        self.cache = cache
+        self.instrumentation = None
         # Initialize the Database engine
         if not no_eng:
             try:
@@ -108,8 +224,11 @@ class DataConnector:
                 url = self.generate_connection_string()
             # If there is already an engine, dispose of it before creating a new one
             self.dispose_engine()
-            engine = create_engine(url, echo=False)
+            engine = create_engine(url, echo=False, **pool_options(self.config))
             self.engine = engine
+            self.pool_monitor = PoolMonitor(engine)
+            if getattr(self, "instrumentation", None) is not None:
+                self.instrumentation.attach(engine)
             print("Engine is set! Engine URL:", url)
         except Exception as err:
             print(f"Error occurred during engine creation: {str(err)}")
@@ -131,6 +250,47 @@ class DataConnector:
             return 1
 
 
+    def pool_stats(self) -> dict:
+        """
+        Returns connection pool metrics for the current engine: checked-out
+        and idle connections, overflow, checkout counts, overflow events,
+        timeouts and the time spent waiting for a checkout (in seconds)
+        """
+        try:
+            return self.pool_monitor.stats()
+        except AttributeError:
+            print("No engine has been configured")
+            return None
+
+    def instrument(
+        self,
+        slow_query_threshold: float = None,
+        explain: bool = False,
+        window: int = 1000,
+        hooks: list = None,
+    ) -> Instrumentation:
+        """
+        Starts recording per-statement and per-operation timings for this
+        DataConnector and returns the Instrumentation (see
+        DBToolBox.instrumentation). Calling it again replaces the settings.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.detach()
+        self.instrumentation = Instrumentation(
+            self.engine,
+            window=window,
+            slow_query_threshold=slow_query_threshold,
+            explain=explain,
+            hooks=hooks,
+        )
+        return self.instrumentation
+
+    def _track(self, operation: str, statement, params=None):
+        """Returns a context that records the operation if instrumentation is on"""
+        if self.instrumentation is None:
+            return nullcontext({})
+        return self.instrumentation.track(operation, statement, params)
+
     def generate_connection_string(self, config: dict = None):
         """
         Returns a connection string to use for SQLAlchemy engine based on the
@@ -173,29 +333,246 @@ class DataConnector:
         chunksize: int = None,
         index_col: str = None,
         columns: list = None,
+        use_cache: bool = True,
+        compact: bool = False,
+        converters: dict = None,
     ) -> pd.DataFrame:
         """
         Runs the given SQL query with optional parameters and returns
-        the result as a Pandas DataFrame
+        the result as a Pandas DataFrame. For large results, use
+        iter_query to stream the rows in bounded-size chunks.
+
+        If the DataConnector has a cache, results of non-chunked queries
+        are served from and stored in it unless `use_cache=False`.
+
+        If `compact=True`, numeric columns are downcast and low-cardinality
+        text columns become categoricals (see EDA.compact_frame).
+
+        @converters: A dictionary of column names to functions that convert
+                     a whole column at once, e.g.
+                     {"created": utils.convert_milli_to_timestamps}
         """
+        cached = use_cache and self.cache is not None and chunksize is None
+        if cached:
+            key = (query, (params, parse_dates, index_col, columns), self.engine.url)
+            df = self.cache.get(*key)
+            if df is not None:
+                df = _convert_columns(df, converters)
+                return compact_frame(df) if compact else df
         try:
             # Run query and put results in DataFrame
-            df = pd.read_sql(
+            with self._track("query", query, params) as record:
+                df = pd.read_sql(
+                    sql=query,
+                    con=self.engine,
+                    params=params,
+                    parse_dates=parse_dates,
+                    chunksize=chunksize,
+                    index_col=index_col,
+                    columns=columns,
+                )
+                if chunksize is None:
+                    record["result"] = df
+            if cached:
+                self.cache.put(key[0], df, params=key[1], url=key[2])
+            if chunksize is not None and converters:
+                df = (_convert_columns(chunk, converters) for chunk in df)
+            elif chunksize is None:
+                df = _convert_columns(df, converters)
+            if compact:
+                if chunksize is not None:
+                    return FrameCompactor().compact_chunks(df)
+                return compact_frame(df)
+            return df
+        except ValueError:
+            print("Please use a valid query")
+            raise
+        except Exception as e:
+            print(f"Something went wrong. Please try again. Error message: {str(e)}")
+            raise
+
+    def iter_query(
+        self,
+        query: str,
+        params=None,
+        chunksize: int = 10000,
+        max_row_buffer: int = 1000,
+        parse_dates: str = None,
+        index_col: str = None,
+        columns: list = None,
+        compact: bool = False,
+        memory_budget: MemoryBudget = None,
+        converters: dict = None,
+    ):
+        """
+        Runs the given SQL query and lazily yields the results as
+        DataFrames of (at most) @chunksize rows.
+
+        @converters: A dictionary of column names to functions that convert
+                     a whole column of each chunk at once (see query)
+
+        If `compact=True`, each chunk is compacted with a shared
+        EDA.FrameCompactor, so the chunks' dtypes and category codes
+        stay consistent.
+
+        With a @memory_budget (see memory.MemoryBudget), the rows are
+        fetched @chunksize at a time and combined into the largest chunks
+        that fit in the budget. Each chunk is reserved in the budget until
+        the next one is requested.
+
+        A dedicated connection with a server-side cursor is held open for
+        the whole iteration, so only one chunk is in memory at a time. The
+        connection is closed once the generator is exhausted, closed or
+        garbage-collected.
+
+        Usage:
+
+        for chunk in dc.iter_query("SELECT * FROM big_table", chunksize=50000):
+            process(chunk)
+        """
+        conn = self.engine.connect().execution_options(
+            stream_results=True, max_row_buffer=max_row_buffer
+        )
+        try:
+            chunks = pd.read_sql(
                 sql=query,
-                con=self.engine,
+                con=conn,
                 params=params,
                 parse_dates=parse_dates,
                 chunksize=chunksize,
                 index_col=index_col,
                 columns=columns,
             )
-            return df
+            if memory_budget is not None:
+                chunks = coalesce_chunks(
+                    chunks, memory_budget, ignore_index=index_col is None
+                )
+            if converters:
+                chunks = (_convert_columns(chunk, converters) for chunk in chunks)
+            if compact:
+                chunks = FrameCompactor().compact_chunks(chunks)
+            for chunk in chunks:
+                yield chunk
         except ValueError:
             print("Please use a valid query")
             raise
-        except Exception as e:
-            print(f"Something went wrong. Please try again. Error message: {str(e)}")
-            raise
+        finally:
+            conn.close()
+
+    def query_partitioned(
+        self,
+        table_or_query: str,
+        partition_column: str,
+        num_partitions: int,
+        lower=None,
+        upper=None,
+        params: dict = None,
+        max_workers: int = None,
+        stream: bool = False,
+    ):
+        """
+        Reads a table (or the result of a query) in parallel by splitting it
+        into @num_partitions ranges of @partition_column, similar to Spark's
+        partitioned JDBC reads. Each range is read over its own pooled
+        connection on a thread pool.
+
+        @lower/@upper: The range of @partition_column to split. If not given,
+                       they are looked up with MIN/MAX. They only decide the
+                       partition strides: rows outside the range (and NULLs)
+                       are still read by the first and last partitions.
+        @params: Named parameters (:name) used by @table_or_query
+        @max_workers: Number of concurrent reads (defaults to @num_partitions)
+        @stream: If True, returns a generator that yields each partition's
+                 DataFrame as soon as it finishes. Otherwise the partitions
+                 are concatenated (in range order) into a single DataFrame.
+
+        Usage:
+
+        df = dc.query_partitioned("events", "event_id", num_partitions=8)
+        """
+        if num_partitions < 1:
+            raise ValueError("num_partitions must be at least 1")
+        source = table_or_query.strip().rstrip(";")
+        if len(source.split()) > 1:
+            source = f"({source}) AS _dbc_source"
+        params = dict(params or {})
+        if lower is None or upper is None:
+            bounds = self.query(
+                text(
+                    f"SELECT MIN({quote_identifier(partition_column)}) AS lower, "
+                    f"MAX({quote_identifier(partition_column)}) AS upper FROM {source}"
+                ),
+                params=params,
+            )
+            lower = bounds["lower"].iloc[0] if lower is None else lower
+            upper = bounds["upper"].iloc[0] if upper is None else upper
+        lower, upper = _bind_value(lower), _bind_value(upper)
+        if pd.isnull(lower) or pd.isnull(upper):
+            # Empty source or only NULL keys: a single partition reads everything
+            partitions = _partition_predicates(partition_column, [])
+        else:
+            partitions = _partition_predicates(
+                partition_column, _partition_bounds(lower, upper, num_partitions)
+            )
+
+        def read_partition(predicate, bound_params):
+            sql = text(f"SELECT * FROM {source} WHERE {predicate}")
+            return pd.read_sql(sql=sql, con=self.engine, params={**params, **bound_params})
+
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(partitions))
+        futures = [executor.submit(read_partition, *partition) for partition in partitions]
+        if stream:
+
+            def iter_partitions():
+                try:
+                    for future in as_completed(futures):
+                        yield future.result()
+                finally:
+                    executor.shutdown(wait=True, cancel_futures=True)
+
+            return iter_partitions()
+        try:
+            frames = [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return pd.concat(frames, ignore_index=True)
+
+    def incremental(
+        self,
+        table: str,
+        watermark_column: str,
+        state_store=None,
+        key: str = None,
+        chunksize: int = 10000,
+        columns: list = None,
+    ) -> IncrementalReader:
+        """
+        Returns an IncrementalReader that streams only the rows of @table
+        beyond the last committed value of @watermark_column (a timestamp
+        or serial id). Call `commit()` on the reader once a chunk has been
+        processed to advance the stored watermark.
+
+        @state_store: Where the watermark is persisted. Defaults to a local
+                      JSON file (see DBToolBox.incremental for a SQLite store).
+
+        Usage:
+
+        reader = dc.incremental("events", "event_id")
+        for chunk in reader:
+            process(chunk)
+            reader.commit()
+        """
+        if key is None:
+            key = f"{self.engine.url}/{table}.{watermark_column}"
+        return IncrementalReader(
+            self,
+            table,
+            watermark_column,
+            state_store=state_store,
+            key=key,
+            chunksize=chunksize,
+            columns=columns,
+        )
 
     def insert(
         self,
@@ -206,27 +583,498 @@ class DataConnector:
         if_exists: str = "replace",
         dtype=None,
         chunksize: int = None,
-        method: str = "multi",
+        method: str = None,
+        memory_budget: MemoryBudget = None,
     ) -> pd.DataFrame:
         """
-        Runs the given SQL query with optional parameters and returns
-        the result as a Pandas DataFrame
+        Inserts the given DataFrame into @table.
+
+        @method: "copy" streams the data through PostgreSQL's COPY command
+                 and is the default for PostgreSQL (psycopg2) engines. Other
+                 dialects fall back to "multi". Any value accepted by
+                 DataFrame.to_sql can also be passed.
+        @memory_budget: If no chunksize is given, the rows are written in
+                        chunks sized to fit half of the remaining budget
+                        (the other half holds the converted rows)
         """
+        if chunksize is None and memory_budget is not None:
+            chunksize = memory_budget.rows_per_chunk(data, fraction=0.5)
         if self.engine:
-            data.to_sql(
+            with self._track("insert", table) as record:
+                data.to_sql(
+                    name=table,
+                    con=self.engine,
+                    schema=schema,
+                    index=index,
+                    if_exists=if_exists,
+                    dtype=dtype,
+                    # Adding chunksize and COPY/multi method to speed up inserts
+                    chunksize=chunksize,
+                    method=resolve_insert_method(self.engine, method),
+                )
+                record["result"] = data
+            self._invalidate_cache(table)
+            return None
+        print("Missing engine: please set the engine and try again")
+        raise KeyError
+
+    def upsert(
+        self,
+        data: pd.DataFrame,
+        table: str,
+        key_columns: list,
+        update_columns: list = None,
+        schema: str = None,
+        chunksize: int = 10000,
+    ) -> int:
+        """
+        Inserts the rows of @data into @table, updating the existing rows
+        whose @key_columns match. The data is bulk-loaded into a temporary
+        staging table (with COPY on PostgreSQL) and merged with a single
+        `INSERT ... ON CONFLICT (...) DO UPDATE` statement, all in one
+        transaction.
+
+        @key_columns: Columns of a primary key or unique constraint of @table
+        @update_columns: Columns to overwrite on conflict. Defaults to every
+                         non-key column of @data; an empty list only inserts
+                         the new rows (ON CONFLICT DO NOTHING).
+
+        If @data holds several rows for the same key, the last one wins.
+        Supported on PostgreSQL and SQLite. Returns the number of rows
+        inserted or updated.
+        """
+        if not self.engine:
+            print("Missing engine: please set the engine and try again")
+            raise KeyError
+        dialect = self.engine.dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            print(f"Upserts are not supported for the {dialect} dialect")
+            raise NotImplementedError
+        key_columns = list(key_columns)
+        columns = list(data.columns)
+        missing = set(key_columns) - set(columns)
+        if missing:
+            raise KeyError(f"Key columns not found in the data: {sorted(missing)}")
+        if update_columns is None:
+            update_columns = [col for col in columns if col not in key_columns]
+        data = data.drop_duplicates(subset=key_columns, keep="last")
+
+        target = qualified_name(table, schema)
+        staging = f"_dbc_staging_{uuid.uuid4().hex[:12]}"
+        column_list = ", ".join(quote_identifier(col) for col in columns)
+        key_list = ", ".join(quote_identifier(col) for col in key_columns)
+        if update_columns:
+            assignments = ", ".join(
+                f"{quote_identifier(col)} = EXCLUDED.{quote_identifier(col)}"
+                for col in update_columns
+            )
+            conflict_action = f"DO UPDATE SET {assignments}"
+        else:
+            conflict_action = "DO NOTHING"
+        # "WHERE true" keeps SQLite from parsing ON CONFLICT as a join clause
+        merge = (
+            f"INSERT INTO {target} ({column_list}) "
+            f"SELECT {column_list} FROM {quote_identifier(staging)} WHERE true "
+            f"ON CONFLICT ({key_list}) {conflict_action}"
+        )
+        on_commit = " ON COMMIT DROP" if dialect == "postgresql" else ""
+
+        with self.engine.begin() as conn:
+            # The staging table copies the column types of the target, without its constraints
+            conn.exec_driver_sql(
+                f"CREATE TEMPORARY TABLE {quote_identifier(staging)}{on_commit} AS "
+                f"SELECT {column_list} FROM {target} LIMIT 0"
+            )
+            if supports_copy(conn):
+                cursor = conn.connection.cursor()
+                try:
+                    copy_rows(cursor, staging, columns, iter_rows(data, chunksize))
+                finally:
+                    cursor.close()
+            else:
+                staging_table = table_clause(staging, *[column(col) for col in columns])
+                rows = iter_rows(data, chunksize)
+                while True:
+                    records = [dict(zip(columns, row)) for row in islice(rows, chunksize)]
+                    if not records:
+                        break
+                    conn.execute(staging_table.insert(), records)
+            affected = conn.exec_driver_sql(merge).rowcount
+            if dialect != "postgresql":
+                conn.exec_driver_sql(f"DROP TABLE {quote_identifier(staging)}")
+        self._invalidate_cache(table)
+        return affected
+
+    def execute_batch(self, sql: str, rows, page_size: int = 1000) -> int:
+        """
+        Runs a parameterized INSERT/UPDATE/DELETE for every row of an
+        iterable of tuples or dicts, sending @page_size rows per round trip,
+        in a single transaction. Rows are consumed lazily, a page at a time.
+        @sql uses the driver's parameter style (%s or %(name)s for psycopg2).
+
+        On psycopg2, statements with a "VALUES %s" placeholder run through
+        psycopg2.extras.execute_values and other statements through
+        execute_batch. Other drivers use executemany per page (pipelined by
+        psycopg 3). See bulk.execute_pages.
+
+        Returns the number of affected rows, or None if the driver cannot
+        report it (execute_batch).
+
+        Usage:
+
+        dc.execute_batch("INSERT INTO events (id, name) VALUES %s", rows)
+        dc.execute_batch(
+            "UPDATE events SET name = v.name FROM (VALUES %s) AS v (id, name) "
+            "WHERE events.id = v.id",
+            rows,
+        )
+        """
+        if not self.engine:
+            print("Missing engine: please set the engine and try again")
+            raise KeyError
+        with self.engine.begin() as conn:
+            cursor = conn.connection.cursor()
+            try:
+                affected = execute_pages(
+                    cursor, sql, rows, page_size, driver=conn.dialect.driver
+                )
+            finally:
+                cursor.close()
+        for table in referenced_tables(sql):
+            self._invalidate_cache(table)
+        return affected
+
+    def export(
+        self,
+        query_or_table: str,
+        path: str,
+        format: str = "parquet",
+        compression: str = None,
+        params=None,
+        schema: str = None,
+        chunksize: int = 100000,
+    ) -> int:
+        """
+        Streams a table (or the result of a query) into a file without
+        loading it into memory, and returns the number of rows written.
+        Tables are given by name ("sales", "public.sales" or @schema).
+
+        @format: "parquet" writes one row group per @chunksize rows, read
+                 through a server-side cursor (see iter_query). "csv" on
+                 PostgreSQL (psycopg2) engines is streamed straight from
+                 `COPY (...) TO STDOUT` into the file; other dialects
+                 write the iter_query chunks.
+        @compression: The Parquet codec (default "snappy"), or "gzip",
+                      "bz2" or "xz" for CSV files (default uncompressed)
+        @params: Query parameters in the driver's style (%(name)s for
+                 psycopg2), which COPY exports bind client-side
+
+        Columns that are entirely NULL in the first Parquet chunk are typed
+        from their first non-NULL value (one extra query per such column).
+
+        Usage:
+
+        dc.export("sales", "sales.parquet", compression="zstd")
+        dc.export("SELECT * FROM sales WHERE year = %(year)s", "sales.csv.gz",
+                  format="csv", compression="gzip", params={"year": 2023})
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        if not self.engine:
+            print("Missing engine: please set the engine and try again")
+            raise KeyError
+        sql = source_query(query_or_table, schema)
+        with self._track("export", sql, params) as record:
+            if format == "csv" and supports_copy(self.engine):
+                with self.engine.connect() as conn:
+                    cursor = conn.connection.cursor()
+                    try:
+                        if params:
+                            sql = cursor.mogrify(sql, params).decode()
+                        rows = copy_to_csv(cursor, sql, path, compression)
+                    finally:
+                        cursor.close()
+            else:
+
+                def chunks_or_empty():
+                    empty = True
+                    for chunk in self.iter_query(sql, params=params, chunksize=chunksize):
+                        empty = False
+                        yield chunk
+                    if empty:
+                        # An empty frame still gives the file its header/schema
+                        yield self.query(
+                            f"SELECT * FROM ({sql}) AS _dbc_source WHERE 1 = 0",
+                            params=params,
+                            use_cache=False,
+                        )
+
+                def column_sample(name):
+                    col = quote_identifier(name)
+                    return self.query(
+                        f"SELECT {col} FROM ({sql}) AS _dbc_source WHERE {col} IS NOT NULL LIMIT 1",
+                        params=params,
+                        use_cache=False,
+                    )
+
+                chunks = chunks_or_empty()
+                if format == "csv":
+                    rows = write_csv(chunks, path, compression)
+                else:
+                    rows = write_parquet(chunks, path, compression, column_sample)
+            record["rows"] = rows
+        return rows
+
+    def load_file(
+        self,
+        path: str,
+        table: str,
+        schema: str = None,
+        format: str = None,
+        compression: str = "infer",
+        if_exists: str = "append",
+        infer_schema: bool = True,
+        sample_rows: int = 10000,
+        dtype=None,
+        delimiter: str = ",",
+        chunksize: int = 100000,
+        method: str = None,
+    ) -> int:
+        """
+        Loads a CSV, Parquet or Arrow IPC file into @table without reading
+        the whole file into memory, in a single transaction, and returns the
+        number of rows loaded.
+
+        @format: "csv", "parquet" or "arrow" (inferred from the extension)
+        @compression: The CSV compression ("gzip", "bz2", "xz" or None),
+                      inferred from the extension by default
+        @if_exists: "append" to an existing table, "replace" it, or "fail"
+        @infer_schema: If the table does not exist (or is replaced), create
+                       it from the column types of the first @sample_rows
+                       rows (override them with @dtype). If False, the table
+                       must already exist.
+
+        CSV files on PostgreSQL (psycopg2) engines are streamed into
+        `COPY ... FROM STDIN` as they are read. Otherwise the file is read
+        @chunksize rows at a time (record batches for Parquet, a memory map
+        for Arrow files) and each chunk is inserted with @method (see insert).
+
+        Usage:
+
+        dc.load_file("sales.csv.gz", "sales")
+        dc.load_file("events.parquet", "events", if_exists="replace")
+        """
+        if if_exists not in ("append", "replace", "fail"):
+            raise ValueError("if_exists must be 'append', 'replace' or 'fail'")
+        if not self.engine:
+            print("Missing engine: please set the engine and try again")
+            raise KeyError
+        format, compression = file_format(path, format, compression)
+        exists = inspect(self.engine).has_table(table, schema=schema)
+        if exists and if_exists == "fail":
+            raise ValueError(f"Table {table} already exists")
+        create = not exists or if_exists == "replace"
+        if create and not infer_schema:
+            print(f"Table {table} does not exist. Create it or set infer_schema=True")
+            raise ValueError(f"Table {table} does not exist")
+
+        def chunks(size):
+            return iter_file_chunks(path, format, size, compression, delimiter)
+
+        sample = None
+        if create:
+            sampler = chunks(sample_rows)
+            try:
+                sample = next(sampler, None)
+            finally:
+                sampler.close()
+            if sample is None:
+                print(f"Cannot infer the columns of {table}: {path} has no rows")
+                raise ValueError("file has no rows")
+
+        with self._track("load", table) as record:
+            with self.engine.begin() as conn:
+                _begin_ddl(conn)
+                if create:
+                    sample.head(0).to_sql(
+                        name=table,
+                        con=conn,
+                        schema=schema,
+                        index=False,
+                        if_exists="replace",
+                        dtype=dtype,
+                    )
+                if format == "csv" and supports_copy(conn):
+                    cursor = conn.connection.cursor()
+                    try:
+                        rows = copy_from_csv(cursor, path, table, schema, compression, delimiter)
+                    finally:
+                        cursor.close()
+                else:
+                    rows = 0
+                    for chunk in chunks(chunksize):
+                        chunk.to_sql(
+                            name=table,
+                            con=conn,
+                            schema=schema,
+                            index=False,
+                            if_exists="append",
+                            method=resolve_insert_method(conn, method),
+                        )
+                        rows += len(chunk)
+            record["rows"] = rows
+        self._invalidate_cache(table)
+        return rows
+
+    def insert_parallel(
+        self,
+        data,
+        table: str,
+        schema: str = None,
+        num_workers: int = 4,
+        shard_size: int = None,
+        atomic: bool = True,
+        index: bool = False,
+        if_exists: str = "append",
+        dtype=None,
+        chunksize: int = None,
+        method: str = None,
+    ) -> pd.DataFrame:
+        """
+        Loads @data into @table over @num_workers pooled connections
+        concurrently. @data can be a DataFrame, which is split into
+        @num_workers shards (or shards of @shard_size rows), or any iterable
+        of DataFrame chunks, where each chunk is a shard.
+
+        @atomic: If True (the default), the workers load the shards into a
+                 staging table. Once every shard has loaded, @table is
+                 created (or replaced, see @if_exists) and filled from the
+                 staging table in a single transaction, so a failed shard
+                 leaves @table untouched. If False, @table is created up
+                 front and each shard is committed to it on its own, so
+                 failed shards do not stop the others.
+
+        Returns a DataFrame report with one row per attempted shard: the shard
+        number, its row count, its status ("committed", "failed" or
+        "rolled_back") and the error message of failed shards.
+        """
+        if not self.engine:
+            print("Missing engine: please set the engine and try again")
+            raise KeyError
+        if if_exists == "fail" and inspect(self.engine).has_table(table, schema=schema):
+            raise ValueError(f"Table {table} already exists")
+        shards = enumerate(_iter_shards(data, num_workers, shard_size))
+        try:
+            first = next(shards)
+        except StopIteration:
+            return pd.DataFrame(columns=["shard", "rows", "status", "error"])
+        # The workers only append: to a staging table if atomic, else to @table
+        target = f"_dbc_staging_{uuid.uuid4().hex[:12]}" if atomic else table
+        first[1].head(0).to_sql(
+            name=target,
+            con=self.engine,
+            schema=schema,
+            index=index,
+            if_exists="fail" if atomic else if_exists,
+            dtype=dtype,
+        )
+        pending = chain([first], shards)
+        lock = threading.Lock()
+        failed = threading.Event()
+        report = []
+
+        def next_shard():
+            with lock:
+                if atomic and failed.is_set():
+                    return None
+                return next(pending, None)
+
+        def worker():
+            results = []
+            while True:
+                item = next_shard()
+                if item is None:
+                    break
+                shard_no, shard = item
+                result = {"shard": shard_no, "rows": len(shard), "status": None, "error": None}
+                results.append(result)
+                try:
+                    with self.engine.begin() as conn:
+                        shard.to_sql(
+                            name=target,
+                            con=conn,
+                            schema=schema,
+                            index=index,
+                            if_exists="append",
+                            dtype=dtype,
+                            chunksize=chunksize,
+                            method=resolve_insert_method(conn, method),
+                        )
+                    result["status"] = "committed"
+                except Exception as e:
+                    result["status"] = "failed"
+                    result["error"] = str(e)
+                    failed.set()
+                    if atomic:
+                        break
+            return results
+
+        try:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                workers = [executor.submit(worker) for _ in range(num_workers)]
+                for future in workers:
+                    report.extend(future.result())
+            if atomic and not failed.is_set():
+                try:
+                    self._publish_staging(target, table, schema, first[1], index, if_exists, dtype)
+                except Exception as e:
+                    failed.set()
+                    for result in report:
+                        result["status"] = "failed"
+                        result["error"] = str(e)
+        finally:
+            if atomic:
+                with self.engine.begin() as conn:
+                    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {qualified_name(target, schema)}")
+                if failed.is_set():
+                    # The staged shards never reached @table
+                    for result in report:
+                        if result["status"] == "committed":
+                            result["status"] = "rolled_back"
+        self._invalidate_cache(table)
+        if failed.is_set():
+            print(f"One or more shards failed to load into {table}")
+        return (
+            pd.DataFrame(report, columns=["shard", "rows", "status", "error"])
+            .sort_values("shard", ignore_index=True)
+        )
+
+    def _publish_staging(self, staging, table, schema, sample, index, if_exists, dtype) -> None:
+        """
+        Creates (or replaces) @table from the @sample frame and copies the
+        rows of the @staging table into it, in one transaction
+        """
+        columns = [col["name"] for col in inspect(self.engine).get_columns(staging, schema=schema)]
+        column_list = ", ".join(quote_identifier(col) for col in columns)
+        with self.engine.begin() as conn:
+            _begin_ddl(conn)
+            sample.head(0).to_sql(
                 name=table,
-                con=self.engine,
+                con=conn,
                 schema=schema,
                 index=index,
                 if_exists=if_exists,
                 dtype=dtype,
-                # Adding chunksize and multi method to speed up inserts
-                chunksize=chunksize,
-                method=method,
             )
-            return None
-        print("Missing engine: please set the engine and try again")
-        raise KeyError
+            conn.exec_driver_sql(
+                f"INSERT INTO {qualified_name(table, schema)} ({column_list}) "
+                f"SELECT {column_list} FROM {qualified_name(staging, schema)}"
+            )
+
+    def _invalidate_cache(self, table: str) -> None:
+        """Drops the cached results that read from a table that was written to"""
+        if self.cache is not None:
+            self.cache.invalidate(table)
 
     @property
     def get_engine(self):
@@ -1,13 +1,64 @@
-import psycopg2
-from psycopg2 import OperationalError
-from sqlalchemy import create_engine
+# pandas, SQLAlchemy and psycopg2 are imported by the functions that use
+# them, so importing this module stays cheap for short-lived jobs
 import datetime
+import hashlib
 import os
-import pandas as pd
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING
 from dotenv import dotenv_values
+from DBToolBox.bulk import resolve_insert_method
 
-# Load db configuration
-config = dotenv_values(".env")
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class _EnvConfig(MutableMapping):
+    """
+    The database configuration from a .env file, read from the working
+    directory on first access rather than at import time
+    """
+
+    def __init__(self, path: str = ".env"):
+        self.path = path
+        self._values = None
+
+    def _load(self) -> dict:
+        if self._values is None:
+            self._values = dotenv_values(self.path)
+        return self._values
+
+    def reload(self) -> None:
+        """Reads the .env file again on the next access"""
+        self._values = None
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+
+    def __delitem__(self, key):
+        del self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
+# Load db configuration (lazily)
+config = _EnvConfig()
+
+# Process-wide registry of pooled engines, keyed by URL and engine options
+_engines = {}
+_engines_lock = threading.Lock()
+# Raw psycopg2 connection pools, keyed by connection parameters
+_connection_pools = {}
+_connection_pools_lock = threading.Lock()
 
 
 def db_connection(user: str, password: str, host: str, port: int, dbname: str):
@@ -15,12 +66,14 @@ def db_connection(user: str, password: str, host: str, port: int, dbname: str):
     Returns a Connection object for the
     specified server
     """
+    import psycopg2
+
     try:
         connection = psycopg2.connect(
             user=user, password=password, host=host, port=port, dbname=dbname
         )
         return connection
-    except (KeyError, OperationalError):
+    except (KeyError, psycopg2.OperationalError):
         print("One of your input parameters is incorrect.")
         print("Please try again.")
         raise
@@ -29,18 +82,171 @@ def db_connection(user: str, password: str, host: str, port: int, dbname: str):
     #     raise
 
 
-def get_alchemy_engine(server_name: str):
+def get_connection_pool(
+    user: str,
+    password: str,
+    host: str,
+    port: int,
+    dbname: str,
+    minconn: int = None,
+    maxconn: int = None,
+    timeout: float = None,
+):
+    """
+    Returns the shared RawConnectionPool (a psycopg2 ThreadedConnectionPool
+    that validates connections on checkout and blocks when @maxconn
+    connections are in use) for the specified server and credentials,
+    creating it on the first call. @timeout is the longest a checkout
+    waits for a free connection (None waits indefinitely).
+
+    There is one pool per server and credentials, so @maxconn caps the
+    connections to it. New pools default to @minconn=1 and @maxconn=10;
+    sizing arguments that conflict with an existing pool raise ValueError.
+    """
+    import psycopg2
+    from DBToolBox.pooling import RawConnectionPool
+
+    # The password is part of the key (hashed), so wrong or rotated
+    # credentials never borrow an authenticated pool
+    secret = hashlib.sha256(str(password).encode("utf-8")).hexdigest()
+    key = (user, secret, host, str(port), dbname)
+    with _connection_pools_lock:
+        pool = _connection_pools.get(key)
+        if pool is None:
+            try:
+                pool = RawConnectionPool(
+                    1 if minconn is None else minconn,
+                    10 if maxconn is None else maxconn,
+                    timeout=timeout,
+                    user=user,
+                    password=password,
+                    host=host,
+                    port=port,
+                    dbname=dbname,
+                )
+            except (KeyError, psycopg2.OperationalError):
+                print("One of your input parameters is incorrect.")
+                print("Please try again.")
+                raise
+            _connection_pools[key] = pool
+            return pool
+        requested = {"minconn": minconn, "maxconn": maxconn, "timeout": timeout}
+        conflicts = [
+            f"{name}={value} (pool has {getattr(pool, name)})"
+            for name, value in requested.items()
+            if value is not None and value != getattr(pool, name)
+        ]
+        if conflicts:
+            print(f"The pool for {user}@{host}:{port}/{dbname} is already open")
+            raise ValueError(f"Conflicting pool options: {', '.join(conflicts)}")
+        return pool
+
+
+def pooled_connection(
+    user: str, password: str, host: str, port: int, dbname: str, **pool_options
+):
+    """
+    Context manager that checks out a connection to the specified server
+    from its shared pool (see get_connection_pool) and returns it to the
+    pool afterwards. The transaction is committed if the block succeeds
+    and rolled back if it raises.
+
+    Usage:
+
+    with pooled_connection("me", "pwd", "db", 5432, "sales") as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+    """
+    pool = get_connection_pool(user, password, host, port, dbname, **pool_options)
+    return pool.connection()
+
+
+def close_connection_pools() -> int:
+    """
+    Closes every raw connection pool and clears the registry.
+    Returns the number of pools closed.
+    """
+    with _connection_pools_lock:
+        pools = list(_connection_pools.values())
+        _connection_pools.clear()
+    for pool in pools:
+        pool.close()
+    return len(pools)
+
+
+def _address_key(address) -> str:
+    """Returns the registry form of a URL string, URL object or engine"""
+    address = getattr(address, "url", address)
+    if hasattr(address, "render_as_string"):
+        return address.render_as_string(hide_password=False)
+    return str(address)
+
+
+def get_cached_engine(address: str, **engine_options):
+    """
+    Returns the pooled SQLAlchemy engine for the given @address and
+    @engine_options (e.g. pool_size, pool_recycle), creating it on the
+    first call. Later calls with the same URL and options reuse the
+    same engine and its connection pool.
+    """
+    from sqlalchemy import create_engine
+
+    key = (_address_key(address), repr(sorted(engine_options.items())))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_engine(address, echo=False, **engine_options)
+            _engines[key] = engine
+        return engine
+
+
+def dispose_engine(address) -> int:
+    """
+    Disposes every cached engine for the given @address (a URL
+    string, URL object or engine) and removes it from the registry.
+    Returns the number of engines disposed.
+    """
+    target = _address_key(address)
+    with _engines_lock:
+        keys = [key for key in _engines if key[0] == target]
+        engines = [_engines.pop(key) for key in keys]
+    for engine in engines:
+        engine.dispose()
+    return len(engines)
+
+
+def dispose_all() -> int:
+    """
+    Disposes every cached engine and clears the registry.
+    Returns the number of engines disposed.
+    """
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.dispose()
+    return len(engines)
+
+
+def _server_address(server_name: str) -> str:
+    """Returns the connection URL for the provided @server_name"""
+    return (
+        f"postgresql+psycopg2://{config['USER']}"
+        + f":{config['PWD']}@{server_name}"
+        + f":{config['PORT']}/{config['DB']}"
+    )
+
+
+def get_alchemy_engine(server_name: str, **engine_options):
     """
     Returns a SQLAlchemy engine that
     is connected to the provided @server_name
+
+    Engines are cached per server and @engine_options,
+    so repeated calls share one connection pool.
     """
     try:
-        address = (
-            f"postgresql+psycopg2://{config['USER']}"
-            + f":{config['PWD']}@{server_name}"
-            + f":{config['PORT']}/{config['DB']}"
-        )
-        engine = create_engine(address, echo=False)
+        engine = get_cached_engine(_server_address(server_name), **engine_options)
         return engine
     except Exception as err:
         print(f"Error occurred during engine creation: {str(err)}")
@@ -102,6 +308,8 @@ def run_query(
         or query.isspace()
     ):
         raise ValueError("Invalid Query")
+    import pandas as pd
+
     try:
         # Run query and put results in DataFrame
         df = pd.read_sql(
@@ -122,14 +330,171 @@ def run_query(
         raise
 
 
+def _fan_out_label(target) -> str:
+    """Returns the source label of a server name or DataConnector (password hidden)"""
+    if isinstance(target, str):
+        return target
+    url = getattr(getattr(target, "engine", None), "url", None)
+    return url.render_as_string(hide_password=True) if url is not None else repr(target)
+
+
+def _fan_out_read(query: str, target, params, timeout: float):
+    """Runs @query against one fan-out target and returns the DataFrame"""
+    if not isinstance(target, str):
+        return target.query(query, params=params)
+    engine = get_alchemy_engine(target)
+    with engine.connect() as conn:
+        if timeout is not None and engine.dialect.name == "postgresql":
+            # Let the server cancel the statement too, so a timed out shard
+            # does not keep running (SET LOCAL ends with the transaction)
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+        return run_query(query, conn, params=params)
+
+
+def _fan_out(query, targets, params, timeout, source_column, max_workers, report):
+    """
+    Yields (position, DataFrame, error) for every target as soon as it
+    finishes, fails or times out
+    """
+    if isinstance(targets, dict):
+        labelled = list(targets.items())
+    else:
+        labelled = [(_fan_out_label(target), target) for target in targets]
+    if not labelled:
+        return
+    started = {}
+
+    def read(position, target):
+        started[position] = time.perf_counter()
+        return _fan_out_read(query, target, params, timeout)
+
+    def record(position, status, rows=None, error=None):
+        entry = {
+            "source": labelled[position][0],
+            "status": status,
+            "rows": rows,
+            "seconds": round(time.perf_counter() - started.get(position, begin), 6),
+            "error": error,
+        }
+        if report is not None:
+            report.append(entry)
+        if error is not None:
+            print(f"Fan-out query failed on {entry['source']}: {error}")
+
+    begin = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(labelled))
+    futures = {
+        executor.submit(read, position, target): position
+        for position, (_, target) in enumerate(labelled)
+    }
+    pending = set(futures)
+    try:
+        while pending:
+            wait_for = None
+            if timeout is not None:
+                # Each target's clock starts when a worker picks it up
+                deadlines = [
+                    started[futures[future]] + timeout
+                    for future in pending
+                    if futures[future] in started
+                ]
+                wait_for = max(min(deadlines) - time.perf_counter(), 0) if deadlines else timeout
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                position = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    record(position, "error", error=str(e))
+                    yield position, None, e
+                    continue
+                if source_column is not None:
+                    # A shallow copy: DataConnector results may be cached frames
+                    df = df.copy(deep=False)
+                    df.insert(0, source_column, labelled[position][0])
+                record(position, "ok", rows=len(df))
+                yield position, df, None
+            if timeout is not None:
+                now = time.perf_counter()
+                for future in list(pending):
+                    position = futures[future]
+                    if position in started and now - started[position] >= timeout:
+                        pending.discard(future)
+                        future.cancel()
+                        error = f"No result after {timeout} seconds"
+                        record(position, "timeout", error=error)
+                        yield position, None, TimeoutError(error)
+    finally:
+        # Do not wait for timed out reads: their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fan_out_query(
+    query: str,
+    targets,
+    params=None,
+    timeout: float = None,
+    source_column: str = "source",
+    stream: bool = False,
+    max_workers: int = None,
+    report: list = None,
+):
+    """
+    Runs the same @query concurrently against several databases (e.g. the
+    shards of one schema), so the total latency is close to that of the
+    slowest target rather than the sum of all of them.
+
+    @targets: A list of server names (read through get_alchemy_engine) and/or
+              DataConnectors, or a dict that maps source labels to them
+    @timeout: Seconds each target may take (from when its read starts).
+              Slower targets are reported as timed out and left out of the
+              result; on PostgreSQL servers the statement is cancelled too.
+    @source_column: Name of the column that tags each row with its source
+                    (None to leave the results untagged)
+    @stream: If True, returns a generator that yields each target's
+             DataFrame as soon as it arrives. Otherwise the results are
+             concatenated (in @targets order) into a single DataFrame.
+    @report: An optional list that receives one dict per target with its
+             source, status ("ok", "error" or "timeout"), rows, seconds
+             and error message, so partial results can be detected.
+
+    Failed and timed out targets are skipped (and printed). If no
+    target returns a result, the first error is raised.
+
+    Usage:
+
+    report = []
+    df = fan_out_query("SELECT * FROM orders", ["shard1", "shard2"], timeout=30, report=report)
+    pd.DataFrame(report)
+    """
+    results = _fan_out(query, targets, params, timeout, source_column, max_workers, report)
+    if stream:
+        return (df for _, df, _ in results if df is not None)
+    import pandas as pd
+
+    frames = {}
+    errors = []
+    for position, df, error in results:
+        if df is None:
+            errors.append(error)
+        else:
+            frames[position] = df
+    if not frames:
+        if errors:
+            raise errors[0]
+        return pd.DataFrame()
+    return pd.concat([frames[position] for position in sorted(frames)], ignore_index=True)
+
+
 def db_insertion(
-    data: pd.DataFrame,
+    data: "pd.DataFrame",
     server_name: str,
     table_name: str,
     schema_name: str = "public",
     engine=None,
     chunksize=1000,
-    method="multi",
+    method=None,
     index: bool = False,
     if_exists: str = "append",
     dtype: dict = None,
@@ -137,6 +502,9 @@ def db_insertion(
     """
     Base function for inserting/appending
     data to a specified @server_name
+
+    @method: "copy" (the default) loads the data with PostgreSQL's
+             COPY command. Non-PostgreSQL engines fall back to "multi".
     """
     if engine is None:
         engine = get_alchemy_engine(server_name)
@@ -147,10 +515,10 @@ def db_insertion(
         index=index,
         if_exists=if_exists,
         dtype=dtype
-        # Adding chunksize and multi method to speed up inserts
+        # Adding chunksize and COPY/multi method to speed up inserts
         ,
         chunksize=chunksize,
-        method=method,
+        method=resolve_insert_method(engine, method),
     )
 
 
@@ -164,22 +532,33 @@ def connect_db():
     return connection
 
 
-def get_alchemy_engine_db():
+def pooled_connect_db(**pool_options):
+    """
+    Context manager that yields a pooled Connection to the Postgres
+    database (see pooled_connection). Prefer it over connect_db for
+    frequent short tasks: connections are reused instead of reopened.
+
+    Usage:
+
+    with pooled_connect_db(maxconn=5) as conn:
+        ...
+    """
+    return pooled_connection(
+        config["USER"],
+        config["PWD"],
+        config["SERVER"],
+        config["PORT"],
+        config["DB"],
+        **pool_options,
+    )
+
+
+def get_alchemy_engine_db(**engine_options):
     """
     Returns a SQLAlchemy engine that
     is connected to the Postgres database
     """
-    try:
-        address = (
-            f"postgresql+psycopg2://{config['USER']}"
-            + f":{config['PWD']}@{config['SERVER']}"
-            + f":{config['PORT']}/{config['DB']}"
-        )
-        engine = create_engine(address, echo=False)
-        return engine
-    except Exception as err:
-        print(f"Error occurred during engine creation: {str(err)}")
-        raise
+    return get_alchemy_engine(config["SERVER"], **engine_options)
 
 
 def get_alchemy_connection_db(stream=False, max_row_buffer=100):
@@ -215,6 +594,8 @@ def query_db(
     chunksize=None,
     index_col=None,
     columns=None,
+    cache=None,
+    compact=False,
 ):
     """
     Runs a query in the Postgres database and returns the
@@ -228,10 +609,42 @@ def query_db(
     @max_row_buffer: If streaming, this sets the number of rows to hold in
                      the buffer. The max is 1000.
     @params: Takes a dictionary of parameters to pass into the query
+    @chunksize: If set, a generator of DataFrames is returned instead
+                (see iter_query_db)
+    @cache: An optional QueryCache (see DBToolBox.cache). Results are
+            served from it when present and stored in it otherwise.
+    @compact: If True, downcasts numeric columns and converts
+              low-cardinality text columns to categoricals
+              (see EDA.compact_frame)
 
     All other params are part of the read_sql Pandas function.
     See https://pandas.pydata.org/docs/reference/api/pandas.read_sql.html
     """
+    if chunksize is not None:
+        # A chunked read needs its connection to outlive this call
+        return iter_query_db(
+            query,
+            connection=connection,
+            chunksize=chunksize,
+            max_row_buffer=max_row_buffer,
+            params=params,
+            parse_dates=parse_dates,
+            index_col=index_col,
+            columns=columns,
+            compact=compact,
+        )
+    if compact:
+        from DBToolBox.EDA import compact_frame
+    if cache is not None:
+        url = (
+            connection.engine.url
+            if connection is not None
+            else get_alchemy_engine(config["SERVER"]).url
+        )
+        key = (query, (params, parse_dates, index_col, columns), url)
+        df = cache.get(*key)
+        if df is not None:
+            return compact_frame(df) if compact else df
     try:
         # Get connection
         conn = connection
@@ -246,22 +659,83 @@ def query_db(
             else:
                 conn = get_alchemy_connection(server_name=config["SERVER"])
         # Run the query
-        df = run_query(query, conn, params=params)
+        df = run_query(
+            query,
+            conn,
+            params=params,
+            parse_dates=parse_dates,
+            index_col=index_col,
+            columns=columns,
+        )
         # Close our connection
         conn.close()
+        if cache is not None:
+            cache.put(key[0], df, params=key[1], url=key[2])
         # Return the DataFrame
-        return df
+        return compact_frame(df) if compact else df
     except Exception as e:
         print(f"Error occurred while querying the database: {str(e)}")
 
 
+def iter_query_db(
+    query,
+    connection=None,
+    chunksize=10000,
+    max_row_buffer=1000,
+    params=None,
+    parse_dates=None,
+    index_col=None,
+    columns=None,
+    compact=False,
+):
+    """
+    Runs a query in the Postgres database and lazily yields
+    the results as DataFrames of (at most) @chunksize rows.
+
+    A streaming (server-side cursor) connection is held open
+    for the whole iteration so that only one chunk is in memory
+    at a time. If no @connection is given, one is opened and
+    closed when the generator is exhausted, closed or
+    garbage-collected. A given @connection is left open.
+
+    @max_row_buffer: The number of rows the cursor pre-fetches
+                     from the server.
+    @compact: If True, compacts every chunk with a shared
+              EDA.FrameCompactor (consistent dtypes and categories)
+    """
+    conn = connection
+    if conn is None:
+        conn = get_alchemy_connection(
+            server_name=config["SERVER"], stream=True, max_row_buffer=max_row_buffer
+        )
+    try:
+        chunks = run_query(
+            query,
+            conn,
+            params=params,
+            parse_dates=parse_dates,
+            chunksize=chunksize,
+            index_col=index_col,
+            columns=columns,
+        )
+        if compact:
+            from DBToolBox.EDA import FrameCompactor
+
+            chunks = FrameCompactor().compact_chunks(chunks)
+        for chunk in chunks:
+            yield chunk
+    finally:
+        if connection is None:
+            conn.close()
+
+
 def insert_db(
-    data: pd.DataFrame,
+    data: "pd.DataFrame",
     table: str,
     schema: str = "public",
     engine=None,
     chunksize=1000,
-    method="multi",
+    method=None,
     index=False,
     if_exists: str = "append",
     dtype: dict = None,
@@ -6,48 +6,332 @@
               Exploratory Data Analysis (EDA) with 
               Pandas 
 """
+from datetime import date, datetime, time
+from decimal import Decimal
+import numpy as np
 import pandas as pd
-import matplotlib
-import sys
+from DBToolBox.profiling import PROFILE_COLUMNS
+
+
+# Numpy dtype kinds whose distinct values can be counted with a vectorized sort
+_SORTABLE_KINDS = "biuf"
+
+
+def _count_distinct_and_nulls(df: pd.DataFrame):
+    """
+    Returns the number of distinct non-null values (like DataFrame.nunique)
+    and the number of nulls of every column, as two arrays. Columns that
+    share a boolean/integer/float dtype are handled together in a single
+    pass: one sort of their 2-D block yields both counts. Other columns
+    are counted with a single hashed value_counts pass each.
+    """
+    columns = df.shape[1]
+    distinct = np.zeros(columns, dtype="int64")
+    nulls = np.zeros(columns, dtype="int64")
+    blocks = {}
+    for position, dtype in enumerate(df.dtypes):
+        if isinstance(dtype, np.dtype) and dtype.kind in _SORTABLE_KINDS:
+            blocks.setdefault(dtype, []).append(position)
+        else:
+            counts = df.iloc[:, position].value_counts(dropna=False, sort=False)
+            missing = counts.index.isna()
+            distinct[position] = np.count_nonzero(counts.to_numpy()[~missing] > 0)
+            nulls[position] = counts.to_numpy()[missing].sum()
+    for dtype, positions in blocks.items():
+        if df.shape[0] == 0:
+            continue
+        # One row per column, so each sort runs over contiguous memory
+        values = np.sort(df.iloc[:, positions].to_numpy(dtype=dtype).T, axis=1)
+        # A value is new if it differs from the one sorted before it
+        new_value = np.ones(values.shape, dtype=bool)
+        new_value[:, 1:] = values[:, 1:] != values[:, :-1]
+        if dtype.kind == "f":
+            missing = np.isnan(values)
+            new_value &= ~missing
+            nulls[positions] = missing.sum(axis=1)
+        distinct[positions] = new_value.sum(axis=1)
+    return distinct, nulls
 
 
 def get_column_info(df: pd.DataFrame) -> pd.DataFrame:
     """Returns a DataFrame with summary column info"""
+    rows = df.shape[0]
+    cardinality, nulls = _count_distinct_and_nulls(df)
+    dtypes = df.dtypes.to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # The cardinality percentage has always been rounded with Python's
+        # (correctly rounded) round and the null percentage with numpy's
+        cardinality_pct = [round(value, 4) for value in (cardinality / rows).tolist()]
+        null_pct = np.round(nulls / rows, 4)
+    is_object = np.array([dtype == "object" for dtype in dtypes], dtype=bool)
+    return pd.DataFrame(
+        {
+            "column_name": df.columns,
+            "cardinality": cardinality,
+            "dtype": dtypes,
+            # Columns with more than 19 distinct values are rated HIGH
+            "cardinality_rating": np.where(cardinality > 19, "HIGH", "LOW").astype(object),
+            "variable_type": np.where(is_object, "Categorical", "Numeric").astype(object),
+            "cardinality_pct": cardinality_pct,
+            "nulls": nulls,
+            "null_pct": null_pct,
+        }
+    )
 
-    def cardinality_rating(row):
-        """Assigns a cardinality rating based on the cardinality"""
-        return "HIGH" if row["cardinality"] > 19 else "LOW"
 
-    def variable_type(row):
-        """Determines if a given column is a Categorical or Numeric variable"""
-        return "Categorical" if row["dtype"] == "object" else "Numeric"
+class FrameCompactor:
+    """
+    Shrinks DataFrames to compact dtypes: numeric columns are downcast to the
+    smallest width that holds their values exactly, and low-cardinality object
+    columns become categoricals. Column decisions are made on the first frame
+    and kept for later ones, so it can compact a stream of chunks
+    consistently: numeric dtypes only ever widen, and categories are extended
+    in order of first appearance, so a value keeps its category code across
+    chunks (combine chunks with pd.api.types.union_categoricals).
+    """
 
-    def cardinality_pct(row):
-        """Determines the percentage of rows that the given cardinality represents"""
-        return round(row["cardinality"] / df.shape[0], 4)
+    def __init__(self, max_cardinality_pct: float = 0.5):
+        self.max_cardinality_pct = max_cardinality_pct
+        self.numeric = {}
+        self.categories = None
 
-    def null_count(row):
-        """Determines the number of null values for a column"""
-        return df[row["column_name"]].isnull().sum()
+    def _choose_categoricals(self, df: pd.DataFrame) -> dict:
+        """Picks the object columns to convert, using get_column_info's cardinality logic"""
+        info = get_column_info(df)
+        low_cardinality = (info["cardinality_rating"] == "LOW") | (
+            info["cardinality_pct"] <= self.max_cardinality_pct
+        )
+        chosen = info.loc[
+            (info["variable_type"] == "Categorical") & low_cardinality, "column_name"
+        ]
+        return {col: [] for col in chosen if df[col].dtype == object}
 
-    def null_pct(row):
-        """Determines the pct of null values for a column"""
-        return round(df[row["column_name"]].isnull().sum() / df.shape[0], 4)
+    @staticmethod
+    def _downcast(column: pd.Series) -> pd.Series:
+        """Returns the column in the smallest numeric dtype that holds it exactly"""
+        if pd.api.types.is_integer_dtype(column):
+            return pd.to_numeric(column, downcast="integer")
+        if pd.api.types.is_float_dtype(column):
+            smaller = pd.to_numeric(column, downcast="float")
+            if smaller.dtype != column.dtype and not (
+                (smaller.astype(column.dtype) == column) | column.isna()
+            ).all():
+                return column
+            return smaller
+        return column
+
+    def compact(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Returns a compacted copy of the given DataFrame"""
+        if self.categories is None:
+            self.categories = self._choose_categoricals(df)
+        result = {}
+        for col in df.columns:
+            column = df[col]
+            if col in self.categories:
+                known = self.categories[col]
+                seen = set(known)
+                known.extend(
+                    value for value in column.dropna().unique() if value not in seen
+                )
+                column = pd.Series(
+                    pd.Categorical(column, categories=known),
+                    index=column.index,
+                    name=col,
+                )
+            elif pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(
+                column
+            ):
+                column = self._downcast(column)
+                if col in self.numeric:
+                    widest = np.promote_types(self.numeric[col], column.dtype)
+                    self.numeric[col] = widest
+                    column = column.astype(widest)
+                else:
+                    self.numeric[col] = column.dtype
+            result[col] = column
+        return pd.DataFrame(result, index=df.index)
+
+    def compact_chunks(self, chunks):
+        """Lazily compacts an iterable of DataFrame chunks"""
+        for chunk in chunks:
+            yield self.compact(chunk)
+
+
+def compact_frame(df: pd.DataFrame, max_cardinality_pct: float = 0.5) -> pd.DataFrame:
+    """
+    Returns a copy of the DataFrame with numeric columns downcast to the
+    smallest safe width and low-cardinality object columns (a LOW
+    cardinality rating, or at most @max_cardinality_pct distinct values
+    per row) converted to categoricals. See FrameCompactor.
+    """
+    return FrameCompactor(max_cardinality_pct).compact(df)
+
+
+# Dialects with a native approximate distinct count
+_APPROX_DISTINCT = {
+    "mssql": "APPROX_COUNT_DISTINCT",
+    "oracle": "APPROX_COUNT_DISTINCT",
+    "snowflake": "APPROX_COUNT_DISTINCT",
+    "bigquery": "APPROX_COUNT_DISTINCT",
+    "duckdb": "approx_count_distinct",
+}
+# Sampling clauses by dialect, formatted with the sample percentage
+_TABLESAMPLE = {
+    "postgresql": "TABLESAMPLE SYSTEM ({pct})",
+    "mssql": "TABLESAMPLE ({pct} PERCENT)",
+}
+# Python types of the columns that can be compared, counted and grouped
+_COMPARABLE_TYPES = (bool, int, float, Decimal, str, datetime, date, time)
+
+
+def _python_type(column_type):
+    """Returns the Python type of a SQLAlchemy column type (None if unknown)"""
+    try:
+        return column_type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _sql_dtype(python_type) -> np.dtype:
+    """Returns the dtype pandas would give a column of the given Python type"""
+    if python_type is bool:
+        return np.dtype(bool)
+    if python_type is int:
+        return np.dtype("int64")
+    if python_type in (float, Decimal):
+        return np.dtype("float64")
+    if python_type is datetime:
+        return np.dtype("datetime64[ns]")
+    return np.dtype(object)
+
+
+def _table_source(dialect, table: str, schema: str = None) -> str:
+    """Returns the quoted (and optionally schema-qualified) table name"""
+    quote = dialect.identifier_preparer.quote
+    return quote(table) if schema is None else f"{quote(schema)}.{quote(table)}"
+
+
+def _limit_clauses(dialect, k: int):
+    """Returns the (TOP, LIMIT) clauses that restrict a SELECT to @k rows"""
+    if dialect.name == "mssql":
+        return f"TOP {int(k)} ", ""
+    return "", f" LIMIT {int(k)}"
 
-    # Build the Dataframe
-    cardinality_df = pd.DataFrame(
-        {"column_name": df.columns, "cardinality": df.nunique(), "dtype": df.dtypes}
-    )
-    cardinality_df["cardinality_rating"] = cardinality_df.apply(
-        cardinality_rating, axis=1
-    )
-    cardinality_df["variable_type"] = cardinality_df.apply(variable_type, axis=1)
-    cardinality_df["cardinality_pct"] = cardinality_df.apply(cardinality_pct, axis=1)
-    cardinality_df["nulls"] = cardinality_df.apply(null_count, axis=1)
-    cardinality_df["null_pct"] = cardinality_df.apply(null_pct, axis=1)
-    cardinality_df.reset_index(inplace=True)
-    cardinality_df.drop(columns="index", inplace=True)
-    return cardinality_df
+
+def profile_table(
+    connector,
+    table: str,
+    sample_pct: float = None,
+    schema: str = None,
+    top_k: int = 5,
+    approximate: bool = False,
+) -> pd.DataFrame:
+    """
+    Description:
+
+    Profiles a database table without pulling its rows over the wire. A
+    single aggregate statement computes the row, null and distinct counts,
+    min/max and top values of every column on the server, and only the
+    small summary comes back. Returns the same frame as
+    profiling.StreamingProfiler.result (the get_column_info columns plus
+    cardinality_exact, min, max and top_values).
+
+    @connector: A DataConnector or SQLAlchemy engine
+    @sample_pct: Profile a TABLESAMPLE of this percentage of the table
+                 (PostgreSQL and SQL Server). Counts are those of the sample.
+    @top_k: Number of most frequent values per column (0 to skip). Top
+            values are returned as text.
+    @approximate: Use the dialect's approximate distinct count where one
+                  is available (exact COUNT(DISTINCT) otherwise)
+
+    Usage:
+
+    dc = DataConnector(config)
+    summary = EDA.profile_table(dc, "sales", sample_pct=1)
+    """
+    from sqlalchemy import inspect, text
+
+    engine = getattr(connector, "engine", connector)
+    dialect = engine.dialect
+    if sample_pct is not None and dialect.name not in _TABLESAMPLE:
+        print(f"TABLESAMPLE is not supported for the {dialect.name} dialect")
+        raise ValueError("sample_pct is only supported on PostgreSQL and SQL Server")
+    columns = inspect(engine).get_columns(table, schema=schema)
+    quote = dialect.identifier_preparer.quote
+    source = _table_source(dialect, table, schema)
+    if sample_pct is not None:
+        source = f"{source} {_TABLESAMPLE[dialect.name].format(pct=float(sample_pct))}"
+    distinct_function = _APPROX_DISTINCT.get(dialect.name) if approximate else None
+
+    # One typed row of aggregates...
+    aggregates = ["COUNT(*) AS n_rows"]
+    comparable = []
+    for position, column in enumerate(columns):
+        name = quote(column["name"])
+        aggregates.append(f"COUNT({name}) AS c{position}_values")
+        python_type = _python_type(column["type"])
+        if python_type not in _COMPARABLE_TYPES:
+            continue
+        comparable.append(position)
+        if distinct_function is None:
+            aggregates.append(f"COUNT(DISTINCT {name}) AS c{position}_distinct")
+        else:
+            aggregates.append(f"{distinct_function}({name}) AS c{position}_distinct")
+        if python_type is not bool:
+            aggregates.append(f"MIN({name}) AS c{position}_min")
+            aggregates.append(f"MAX({name}) AS c{position}_max")
+    branches = [
+        f"SELECT {', '.join(aggregates)}, NULL AS top_column, "
+        "NULL AS top_value, NULL AS top_count FROM src"
+    ]
+    # ...followed by the top values of each column, padded to the same shape
+    padding = ", ".join(["NULL"] * len(aggregates))
+    top, limit = _limit_clauses(dialect, top_k)
+    for position in comparable if top_k else []:
+        name = quote(columns[position]["name"])
+        branches.append(
+            f"SELECT {padding}, {position}, CAST(value AS VARCHAR(4000)), n FROM "
+            f"(SELECT {top}{name} AS value, COUNT(*) AS n FROM src "
+            f"WHERE {name} IS NOT NULL GROUP BY {name} ORDER BY n DESC{limit}) t{position}"
+        )
+    sql = f"WITH src AS (SELECT * FROM {source}) " + " UNION ALL ".join(branches)
+    with engine.connect() as conn:
+        result = conn.execute(text(sql)).mappings().all()
+
+    stats = result[0]
+    top_values = {}
+    for row in result[1:]:
+        top_values.setdefault(row["top_column"], []).append(
+            (row["top_value"], int(row["top_count"]))
+        )
+    rows = stats["n_rows"]
+    records = []
+    for position, column in enumerate(columns):
+        dtype = _sql_dtype(_python_type(column["type"]))
+        nulls = rows - stats[f"c{position}_values"]
+        distinct = stats.get(f"c{position}_distinct")
+        cardinality = None if distinct is None else int(distinct)
+        records.append(
+            {
+                "column_name": column["name"],
+                "cardinality": cardinality,
+                "dtype": dtype,
+                "cardinality_rating": "HIGH"
+                if cardinality is not None and cardinality > 19
+                else "LOW",
+                "variable_type": "Categorical" if dtype == "object" else "Numeric",
+                "cardinality_pct": round(cardinality / rows, 4)
+                if rows and cardinality is not None
+                else np.nan,
+                "nulls": nulls,
+                "null_pct": round(nulls / rows, 4) if rows else np.nan,
+                "cardinality_exact": distinct_function is None and cardinality is not None,
+                "min": stats.get(f"c{position}_min"),
+                "max": stats.get(f"c{position}_max"),
+                "top_values": top_values.get(position, []),
+            }
+        )
+    return pd.DataFrame(records, columns=PROFILE_COLUMNS)
 
 
 def get_cardinality(column: pd.Series) -> int:
@@ -55,10 +339,111 @@ def get_cardinality(column: pd.Series) -> int:
     return column.nunique()
 
 
-def visualize_distribution(df: pd.DataFrame, col: str):
-    """Visualize the distribution of values for the given column"""
-    df[col].value_counts().plot(kind="bar")
+def top_value_counts(
+    connector, table: str, col: str, top_k: int = 20, schema: str = None
+) -> pd.Series:
+    """
+    Returns the counts of the @top_k most frequent non-null values of
+    @col, computed by the database with a single GROUP BY query. The
+    remaining values are folded into an "other" bucket.
+    """
+    from sqlalchemy import text
+
+    engine = getattr(connector, "engine", connector)
+    dialect = engine.dialect
+    name = dialect.identifier_preparer.quote(col)
+    top, limit = _limit_clauses(dialect, top_k)
+    sql = (
+        f"SELECT {top}{name} AS value, COUNT(*) AS n, SUM(COUNT(*)) OVER () AS total "
+        f"FROM {_table_source(dialect, table, schema)} WHERE {name} IS NOT NULL "
+        f"GROUP BY {name} ORDER BY n DESC, {name}{limit}"
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql)).all()
+    counts = pd.Series(
+        [int(row.n) for row in rows],
+        index=pd.Index([row.value for row in rows], name=col),
+        name="count",
+        dtype="int64",
+    )
+    other = (int(rows[0].total) if rows else 0) - counts.sum()
+    if other > 0:
+        counts.loc["other"] = other
+    return counts
+
+
+def visualize_distribution(
+    df, col: str, table: str = None, top_k: int = None, schema: str = None
+) -> pd.Series:
+    """
+    Visualize the distribution of values for the given column and return
+    the plotted counts. Requires matplotlib.
+
+    @df: A DataFrame, or a DataConnector/engine together with @table to
+         count the values in the database (only @top_k rows are fetched)
+    @top_k: Plot only the most frequent values and fold the rest into an
+            "other" bar (defaults to 20 for tables and all values for DataFrames)
+
+    Usage:
+
+    EDA.visualize_distribution(df, "city")
+    EDA.visualize_distribution(dc, "city", table="customers", top_k=10)
+    """
+    if table is not None:
+        counts = top_value_counts(df, table, col, 20 if top_k is None else top_k, schema)
+    else:
+        counts = df[col].value_counts()
+        if top_k is not None and len(counts) > top_k:
+            other = counts.iloc[top_k:].sum()
+            counts = counts.iloc[:top_k]
+            counts.loc["other"] = other
+    counts.plot(kind="bar")
+    return counts
+
+
+def _object_bytes(values: np.ndarray, sample_size: int, exact: bool):
+    """
+    Returns the deep size of an object array (its pointers plus the objects
+    they reference) and whether it was estimated from a random sample
+    """
+    rows = len(values)
+    if exact or rows <= sample_size:
+        return pd.Series(values).memory_usage(index=False, deep=True), False
+    sample = values[np.random.default_rng(0).choice(rows, sample_size, replace=False)]
+    objects = pd.Series(sample).memory_usage(index=False, deep=True) - sample.nbytes
+    return int(round(objects / sample_size * rows)) + values.nbytes, True
+
+
+def memory_report(
+    df: pd.DataFrame, exact: bool = False, sample_size: int = 10000
+) -> pd.DataFrame:
+    """
+    Returns the deep memory usage of the index and every column of the
+    DataFrame, including the payload of object (e.g. string) values.
+
+    Object columns longer than @sample_size are estimated from a random
+    sample of their values, which keeps the report fast on huge frames;
+    pass `exact=True` to measure every value (like memory_usage(deep=True)).
+    """
+    records = []
+    parts = [("Index", df.index)] + [(col, df[col]) for col in df.columns]
+    for name, part in parts:
+        if part.dtype == object:
+            size, estimated = _object_bytes(part.to_numpy(), sample_size, exact)
+        elif isinstance(part, pd.Index):
+            size, estimated = part.memory_usage(deep=True), False
+        else:
+            size, estimated = part.memory_usage(index=False, deep=True), False
+        records.append(
+            {"column_name": name, "dtype": part.dtype, "bytes": int(size), "estimated": estimated}
+        )
+    report = pd.DataFrame(records, columns=["column_name", "dtype", "bytes", "estimated"])
+    total = report["bytes"].sum()
+    report.insert(3, "mb", (report["bytes"] / 10**6).round(4))
+    report.insert(4, "pct", (report["bytes"] / total).round(4) if total else 0.0)
+    return report
 
 
-def get_size_mb(df: pd.DataFrame) -> float:
-    return round(sys.getsizeof(df) / 10**6, 4)
+def get_size_mb(df: pd.DataFrame, exact: bool = False, sample_size: int = 10000) -> float:
+    """Returns the deep memory usage of the DataFrame in MB (see memory_report)"""
+    return round(memory_report(df, exact, sample_size)["bytes"].sum() / 10**6, 4)
@@ -0,0 +1,202 @@
+"""Helpers for bulk loading data into PostgreSQL with COPY and for batched writes"""
+import io
+import numbers
+import re
+from itertools import islice
+
+
+def quote_identifier(name: str) -> str:
+    """Returns the given name as a double-quoted SQL identifier"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def qualified_name(table: str, schema: str = None) -> str:
+    """Returns a quoted (and optionally schema-qualified) table name"""
+    if schema:
+        return f"{quote_identifier(schema)}.{quote_identifier(table)}"
+    return quote_identifier(table)
+
+
+# The NULL marker of the COPY statements. Strings are always quoted, so
+# neither an empty string nor a string equal to the marker is read as NULL.
+COPY_NULL = "\\N"
+
+
+def copy_field(value) -> str:
+    """
+    Renders a value as a field of COPY's CSV format: None as the NULL
+    marker, whole-number floats as integers (so nullable integer columns,
+    which pandas holds as floats, load into INTEGER columns), bytes as
+    quoted bytea hex and every other non-numeric value as a quoted string
+    """
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        if value != value:
+            return COPY_NULL
+        if value.is_integer() and abs(value) < 2**63:
+            return str(int(value))
+        return repr(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return '"\\x' + bytes(value).hex() + '"'
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class CSVRowStream(io.TextIOBase):
+    """
+    A read-only file-like object that renders an iterable of rows as CSV
+    on demand (see copy_field). psycopg2's copy_expert pulls from it in
+    fixed-size blocks, so only a handful of rows are ever held as text at
+    the same time.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._pending = ""
+
+    def readable(self):
+        return True
+
+    def _fill(self, size: int) -> None:
+        """Renders rows into the pending buffer until it holds @size characters"""
+        while size < 0 or len(self._pending) < size:
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                break
+            self._pending += ",".join(copy_field(value) for value in row) + "\n"
+
+    def read(self, size: int = -1) -> str:
+        size = -1 if size is None else size
+        self._fill(size)
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def readline(self, size: int = -1) -> str:
+        while "\n" not in self._pending:
+            before = len(self._pending)
+            self._fill(before + 1)
+            if len(self._pending) == before:
+                break
+        end = self._pending.find("\n") + 1 or len(self._pending)
+        if size is not None and 0 <= size < end:
+            end = size
+        line, self._pending = self._pending[:end], self._pending[end:]
+        return line
+
+
+def iter_rows(data, chunksize: int = 10000):
+    """
+    Lazily yields the rows of a DataFrame as tuples, with missing values
+    (NaN/NaT/None) converted to None. Rows are converted @chunksize at a time.
+    """
+    for start in range(0, len(data), chunksize):
+        chunk = data.iloc[start : start + chunksize].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def copy_rows(cursor, table: str, columns, rows, schema: str = None) -> int:
+    """
+    Streams an iterable of row tuples into @table through
+    `COPY ... FROM STDIN` using the given psycopg2 cursor.
+    Returns the number of rows copied.
+    """
+    column_list = ", ".join(quote_identifier(col) for col in columns)
+    sql = (
+        f"COPY {qualified_name(table, schema)} ({column_list}) "
+        f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    )
+    cursor.copy_expert(sql=sql, file=CSVRowStream(rows))
+    return cursor.rowcount
+
+
+def psql_insert_copy(table, conn, keys, data_iter) -> int:
+    """
+    Insertion method for DataFrame.to_sql that loads each chunk with
+    PostgreSQL's COPY command instead of INSERT statements. See
+    https://pandas.pydata.org/docs/user_guide/io.html#io-sql-method
+    """
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cur:
+        return copy_rows(cur, table.name, keys, data_iter, schema=table.schema)
+
+
+def supports_copy(connectable) -> bool:
+    """Returns True if the given engine/connection can use the COPY load path"""
+    dialect = connectable.dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def resolve_insert_method(connectable, method=None):
+    """
+    Returns the DataFrame.to_sql insertion method to use for the given
+    engine/connection. "copy" (the default) resolves to psql_insert_copy
+    on PostgreSQL engines and falls back to "multi" for other dialects.
+    """
+    if method is None or method == "copy":
+        return psql_insert_copy if supports_copy(connectable) else "multi"
+    return method
+
+
+# A statement written for execute_values, e.g. "INSERT INTO t (a, b) VALUES %s"
+_VALUES_PLACEHOLDER = re.compile(r"\bvalues\s+%s", re.IGNORECASE)
+
+
+def iter_pages(rows, page_size: int):
+    """Lazily yields lists of at most @page_size items from an iterable"""
+    rows = iter(rows)
+    while True:
+        page = list(islice(rows, page_size))
+        if not page:
+            return
+        yield page
+
+
+def execute_pages(cursor, sql: str, rows, page_size: int = 1000, driver: str = None) -> int:
+    """
+    Runs a parameterized statement for every row of an iterable of tuples
+    or dicts, @page_size rows per round trip, using the given DBAPI cursor.
+    Rows are consumed lazily, one page at a time.
+
+    - psycopg2, with a "VALUES %s" statement: psycopg2.extras.execute_values,
+      which sends each page as one multi-row statement
+    - psycopg2, other statements: psycopg2.extras.execute_batch, which sends
+      each page as one batch of statements
+    - psycopg (3) and other drivers: cursor.executemany per page (psycopg 3
+      pipelines it)
+
+    Returns the number of affected rows, or None if the driver cannot report
+    it (execute_batch only reports the last statement of a batch; write
+    UPDATEs as "UPDATE ... FROM (VALUES %s) AS v (...)" to get exact counts).
+    """
+    driver = driver or type(cursor).__module__.split(".")[0]
+    use_values = bool(_VALUES_PLACEHOLDER.search(sql))
+    if use_values and driver != "psycopg2":
+        raise ValueError("'VALUES %s' statements require the psycopg2 driver")
+    affected = 0
+    for page in iter_pages(rows, page_size):
+        if driver == "psycopg2":
+            from psycopg2.extras import execute_batch, execute_values
+
+            if use_values:
+                template = None
+                if isinstance(page[0], dict):
+                    template = "(" + ", ".join(f"%({key})s" for key in page[0]) + ")"
+                execute_values(cursor, sql, page, template=template, page_size=len(page))
+            else:
+                execute_batch(cursor, sql, page, page_size=len(page))
+                affected = None
+                continue
+        else:
+            cursor.executemany(sql, page)
+        if affected is not None:
+            affected = affected + cursor.rowcount if cursor.rowcount >= 0 else None
+    return affected
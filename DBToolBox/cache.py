@@ -0,0 +1,285 @@
+"""A two-tier (memory + disk) cache for query results"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+# Splits SQL into string literals and everything else
+_LITERAL = re.compile(r"('(?:[^']|'')*')")
+# Keywords that can follow a table name and must not be read as its alias
+_CLAUSE_KEYWORDS = (
+    "where|join|inner|left|right|full|cross|natural|on|using|group|order|"
+    "having|limit|offset|union|intersect|except|window|set|values|select|"
+    "default|returning|for|fetch"
+)
+# A (quoted, optionally schema-qualified) table name with an optional alias
+_TABLE_ITEM = re.compile(
+    r"((?:\"[^\"]+\"|[\w$]+)(?:\.(?:\"[^\"]+\"|[\w$]+))?)"
+    rf"(?:\s+(?:as\s+)?(?!(?:{_CLAUSE_KEYWORDS})\b)[\w$]+)?",
+    re.IGNORECASE,
+)
+# Table references that follow FROM/JOIN/INTO/UPDATE, including every
+# item of a comma-separated FROM list
+_TABLE_REFERENCE = re.compile(
+    rf"\b(?:from|join|into|update)\s+({_TABLE_ITEM.pattern}(?:\s*,\s*{_TABLE_ITEM.pattern})*)",
+    re.IGNORECASE,
+)
+# Tags queries whose tables could not be found, so any write invalidates them
+ANY_TABLE = "*"
+
+
+def normalize_sql(sql) -> str:
+    """
+    Returns the given SQL with insignificant whitespace collapsed and any
+    trailing semicolon removed. String literals are left untouched.
+    """
+    parts = _LITERAL.split(str(sql).strip().rstrip(";").strip())
+    return "".join(
+        part if part.startswith("'") else re.sub(r"\s+", " ", part) for part in parts
+    )
+
+
+def referenced_tables(sql) -> set:
+    """
+    Returns the (lowercase, unquoted) names of the tables referenced by the
+    given SQL. Schema-qualified names are returned both with and without
+    their schema so either form can be used for invalidation. If no table
+    is found, the result is {ANY_TABLE}, which every invalidation matches.
+    """
+    code = " ".join(
+        part for part in _LITERAL.split(str(sql)) if not part.startswith("'")
+    )
+    tables = set()
+    for reference in _TABLE_REFERENCE.finditer(code):
+        for item in _TABLE_ITEM.finditer(reference.group(1)):
+            name = item.group(1).replace('"', "").lower()
+            tables.add(name)
+            tables.add(name.split(".")[-1])
+    return tables or {ANY_TABLE}
+
+
+def _sorted_params(params):
+    """Returns @params with the items of every (nested) dict sorted by key"""
+    if isinstance(params, dict):
+        items = sorted(params.items(), key=lambda item: repr(item[0]))
+        return ("dict", tuple((key, _sorted_params(value)) for key, value in items))
+    if isinstance(params, (list, tuple)):
+        return type(params)(_sorted_params(value) for value in params)
+    return params
+
+
+class QueryCache:
+    def __init__(
+        self,
+        max_entries: int = 128,
+        max_bytes: int = None,
+        ttl: float = None,
+        disk_path: str = None,
+        disk_format: str = "parquet",
+    ):
+        """
+        Description:
+
+        Caches query results keyed by the normalized SQL, its parameters and
+        the connection URL. Results are kept in a size-bounded, least recently
+        used in-memory tier and, optionally, written through to an on-disk
+        Parquet or Feather tier that survives process restarts.
+
+        @max_entries: Maximum number of results held in memory
+        @max_bytes: Maximum (deep) size of the results held in memory
+        @ttl: Default time-to-live of an entry in seconds (None never expires)
+        @disk_path: Directory of the on-disk tier (disabled if None).
+                    Requires pyarrow.
+        @disk_format: "parquet" or "feather"
+
+        Usage:
+
+        cache = QueryCache(max_entries=256, ttl=600, disk_path=".dbcache")
+        dc = DataConnector(config, cache=cache)
+        df = dc.query("SELECT * FROM sales")  # Hits the database
+        df = dc.query("SELECT * FROM sales")  # Served from the cache
+        cache.invalidate("sales")
+        """
+        if disk_format not in ("parquet", "feather"):
+            raise ValueError("disk_format must be 'parquet' or 'feather'")
+        if disk_path is not None:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print("The on-disk cache tier requires pyarrow. Please install it and try again")
+                raise
+            os.makedirs(disk_path, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.disk_format = disk_format
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(sql, params=None, url=None) -> str:
+        """
+        Returns the cache key for a query, its parameters and connection URL.
+        Named parameters (at any depth) give the same key in any order.
+        """
+        raw = json.dumps([normalize_sql(sql), repr(_sorted_params(params)), str(url)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, f"{key}.{self.disk_format}")
+
+    def _meta_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, f"{key}.json")
+
+    def get(self, sql, params=None, url=None):
+        """Returns a copy of the cached result, or None on a miss"""
+        key = self.make_key(sql, params, url)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry["expires"] is None or entry["expires"] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry["data"].copy()
+                self._remove(key)
+            data = self._read_disk(key, now)
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            return data.copy()
+
+    def put(self, sql, df: pd.DataFrame, params=None, url=None, ttl: float = None) -> None:
+        """Caches a copy of @df for the given query (with an optional per-entry @ttl)"""
+        key = self.make_key(sql, params, url)
+        ttl = self.ttl if ttl is None else ttl
+        entry = {
+            "data": df.copy(),
+            "expires": None if ttl is None else time.time() + ttl,
+            "tables": sorted(referenced_tables(sql)),
+            "size": int(df.memory_usage(deep=True).sum()),
+        }
+        with self._lock:
+            self._remove(key)
+            self._store(key, entry)
+            self._write_disk(key, entry)
+
+    def _store(self, key: str, entry: dict) -> None:
+        """Adds an entry to the memory tier, evicting the least recently used ones"""
+        if self.max_bytes is not None and entry["size"] > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry["size"]
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["size"]
+            self.evictions += 1
+
+    def _remove(self, key: str, disk: bool = False) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry["size"]
+        if disk:
+            self._remove_disk(key)
+
+    def _remove_disk(self, key: str) -> None:
+        if self.disk_path is None:
+            return
+        for path in (self._disk_file(key), self._meta_file(key)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _write_disk(self, key: str, entry: dict) -> None:
+        if self.disk_path is None:
+            return
+        try:
+            if self.disk_format == "parquet":
+                entry["data"].to_parquet(self._disk_file(key))
+            else:
+                entry["data"].reset_index(drop=True).to_feather(self._disk_file(key))
+            meta = {field: entry[field] for field in ("expires", "tables", "size")}
+            with open(self._meta_file(key), "w") as f:
+                json.dump(meta, f)
+        except Exception as e:
+            # Results that cannot be serialized stay in the memory tier only
+            print(f"Could not write the result to the disk cache: {str(e)}")
+            self._remove_disk(key)
+
+    def _read_disk(self, key: str, now: float):
+        """Returns the result from the disk tier (promoting it to memory), or None"""
+        if self.disk_path is None or not os.path.exists(self._meta_file(key)):
+            return None
+        with open(self._meta_file(key)) as f:
+            meta = json.load(f)
+        if meta["expires"] is not None and meta["expires"] <= now:
+            self._remove(key, disk=True)
+            return None
+        if self.disk_format == "parquet":
+            data = pd.read_parquet(self._disk_file(key))
+        else:
+            data = pd.read_feather(self._disk_file(key))
+        self._store(key, {**meta, "data": data})
+        return data
+
+    def invalidate(self, table: str = None) -> int:
+        """
+        Removes every entry that references @table (e.g. "sales" or
+        "public.sales") from both tiers, or every entry if no table is given.
+        Tables are matched by name regardless of schema, so an invalidation
+        never misses an unqualified reference; entries whose tables could
+        not be parsed are always removed. Returns the number of entries
+        removed.
+        """
+        name = None if table is None else table.replace('"', "").lower().split(".")[-1]
+        with self._lock:
+            keys = {
+                key
+                for key, entry in self._entries.items()
+                if name is None or name in entry["tables"] or ANY_TABLE in entry["tables"]
+            }
+            if self.disk_path is not None:
+                for filename in os.listdir(self.disk_path):
+                    if not filename.endswith(".json"):
+                        continue
+                    key = filename[: -len(".json")]
+                    if name is not None:
+                        with open(self._meta_file(key)) as f:
+                            tables = json.load(f)["tables"]
+                            if name not in tables and ANY_TABLE not in tables:
+                                continue
+                    keys.add(key)
+            for key in keys:
+                self._remove(key, disk=True)
+            return len(keys)
+
+    def clear(self) -> int:
+        """Removes every entry from the cache"""
+        return self.invalidate()
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and the current size of the memory tier"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,199 @@
+"""Watermark-based incremental extraction with persistent state"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from DBToolBox.bulk import qualified_name, quote_identifier
+
+DEFAULT_STATE_PATH = ".dbc_watermarks.json"
+
+
+def _encode(value):
+    """Converts a watermark into a JSON-serializable value"""
+    if isinstance(value, pd.Timestamp):
+        # The ISO form keeps the nanoseconds that to_pydatetime would drop
+        return {"type": "timestamp", "value": value.isoformat()}
+    if isinstance(value, np.datetime64):
+        return _encode(pd.Timestamp(value))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"type": "date", "value": value.isoformat()}
+    return {"type": "value", "value": value}
+
+
+def _decode(stored):
+    """Converts a stored watermark back into a Python value"""
+    if stored is None:
+        return None
+    if stored["type"] == "timestamp":
+        return pd.Timestamp(stored["value"])
+    if stored["type"] == "datetime":
+        return datetime.fromisoformat(stored["value"])
+    if stored["type"] == "date":
+        return date.fromisoformat(stored["value"])
+    return stored["value"]
+
+
+class JSONStateStore:
+    """Persists watermarks in a local JSON file"""
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def get(self, key: str):
+        """Returns the stored watermark for @key, or None"""
+        with self._lock:
+            return _decode(self._load().get(key))
+
+    def set(self, key: str, value) -> None:
+        """Stores the watermark for @key (atomically replacing the file)"""
+        with self._lock:
+            state = self._load()
+            state[key] = _encode(value)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(temp_path, self.path)
+
+
+class SQLiteStateStore:
+    """Persists watermarks in a local SQLite database file"""
+
+    def __init__(self, path: str = ".dbc_watermarks.db"):
+        self.path = path
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+    def get(self, key: str):
+        """Returns the stored watermark for @key, or None"""
+        with sqlite3.connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT value FROM watermarks WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else _decode(json.loads(row[0]))
+
+    def set(self, key: str, value) -> None:
+        """Stores the watermark for @key"""
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "INSERT INTO watermarks (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(_encode(value))),
+            )
+
+
+class IncrementalReader:
+    def __init__(
+        self,
+        connector,
+        table: str,
+        watermark_column: str,
+        state_store=None,
+        key: str = None,
+        chunksize: int = 10000,
+        columns: list = None,
+    ):
+        """
+        Description:
+
+        Reads the rows of @table whose @watermark_column (a monotonically
+        increasing timestamp or serial id) is beyond the last committed
+        watermark, and yields them as DataFrame chunks in watermark order.
+
+        The watermark only advances when the consumer calls `commit()`,
+        which confirms every chunk yielded so far. Rows that share a
+        watermark value are never split across chunks, so a committed
+        watermark always means all rows up to and including it were
+        delivered. Rows with a NULL watermark are never read.
+
+        @state_store: Any object with get(key)/set(key, value) methods.
+                      Defaults to a JSONStateStore in the working directory.
+        @key: The state key of this extraction (defaults to the table and column)
+
+        Usage:
+
+        reader = dc.incremental("events", "updated_at")
+        for chunk in reader:
+            load(chunk)
+            reader.commit()
+        """
+        self.connector = connector
+        self.table = table
+        self.watermark_column = watermark_column
+        self.state_store = JSONStateStore() if state_store is None else state_store
+        self.key = key if key is not None else f"{table}.{watermark_column}"
+        self.chunksize = chunksize
+        self.columns = columns
+        self._pending = None
+
+    @property
+    def watermark(self):
+        """Returns the last committed watermark (None if nothing was committed yet)"""
+        return self.state_store.get(self.key)
+
+    def commit(self) -> None:
+        """Advances the stored watermark past every chunk yielded so far"""
+        if self._pending is not None:
+            self.state_store.set(self.key, self._pending)
+            self._pending = None
+
+    def __iter__(self):
+        col = self.watermark_column
+        quoted = quote_identifier(col)
+        columns = self.columns
+        if columns is not None and col not in columns:
+            columns = list(columns) + [col]
+        select = "*" if columns is None else ", ".join(quote_identifier(c) for c in columns)
+        schema, _, table = self.table.rpartition(".")
+        last = self.watermark
+        where = f"{quoted} IS NOT NULL"
+        params = {}
+        # Drivers bind datetimes with microsecond precision at most: a watermark
+        # with nanoseconds is bound rounded down and compared exactly below
+        exact_filter = isinstance(last, pd.Timestamp) and last.nanosecond != 0
+        if last is not None:
+            operator = ">=" if exact_filter else ">"
+            where = f"{where} AND {quoted} {operator} :_dbc_watermark"
+            params["_dbc_watermark"] = (
+                last.to_pydatetime(warn=False) if isinstance(last, pd.Timestamp) else last
+            )
+        sql = text(
+            f"SELECT {select} FROM {qualified_name(table, schema or None)} "
+            f"WHERE {where} ORDER BY {quoted}"
+        )
+        carry = None
+        for chunk in self.connector.iter_query(sql, params=params, chunksize=self.chunksize):
+            if exact_filter:
+                chunk = chunk[pd.to_datetime(chunk[col], format="ISO8601") > last]
+                if chunk.empty:
+                    continue
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            # Hold back the rows of the highest watermark: more may follow
+            top = chunk[col].iloc[-1]
+            last_rows = chunk[col] == top
+            carry = chunk[last_rows]
+            ready = chunk[~last_rows]
+            if ready.empty:
+                continue
+            self._pending = ready[col].iloc[-1]
+            yield ready.reset_index(drop=True)
+        if carry is not None and not carry.empty:
+            self._pending = carry[col].iloc[-1]
+            yield carry.reset_index(drop=True)
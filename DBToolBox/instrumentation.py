@@ -0,0 +1,274 @@
+"""Per-query instrumentation built on SQLAlchemy engine events"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import pandas as pd
+from sqlalchemy import event, text
+from DBToolBox.EDA import memory_report
+
+logger = logging.getLogger(__name__)
+
+# Prefixes that turn a query into a plan request, by dialect.
+# EXPLAIN ANALYZE runs the query again to measure it.
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN (ANALYZE, BUFFERS) ",
+    "mysql": "EXPLAIN ANALYZE ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+PHASES = ["pool_wait_s", "connect_s", "execute_s", "fetch_s", "to_sql_s"]
+
+
+def _frame_bytes(df) -> int:
+    """Returns the approximate (sampled deep) size of a DataFrame"""
+    return int(memory_report(df, sample_size=1000)["bytes"].sum())
+
+
+class Instrumentation:
+    def __init__(
+        self,
+        engine,
+        window: int = 1000,
+        slow_query_threshold: float = None,
+        explain: bool = False,
+        hooks: list = None,
+    ):
+        """
+        Description:
+
+        Records timings for every statement run through a SQLAlchemy engine
+        and, through DataConnector.query/insert, per-operation phase timings:
+
+            pool_wait_s: Obtaining a pooled connection
+            connect_s: From the start of the operation to the first statement
+                       (includes the pool wait and statement preparation)
+            execute_s: Running the statements on the server
+            fetch_s: Fetching the rows and building the DataFrame (queries)
+            to_sql_s: Converting and batching the rows in to_sql (inserts)
+
+        along with the rows, the approximate bytes of the DataFrame and the
+        number of statements. Each record is passed to the registered hooks
+        and kept in a rolling window for summary().
+
+        Operations slower than @slow_query_threshold seconds are logged to
+        the "DBToolBox.instrumentation" logger and kept in `slow_queries`.
+        With `explain=True`, the plan of slow queries is captured too
+        (EXPLAIN (ANALYZE, BUFFERS) on PostgreSQL, which runs the query again).
+
+        Usage:
+
+        instr = dc.instrument(slow_query_threshold=2.0, explain=True)
+        instr.add_hook(lambda record: print(record["total_s"]))
+        dc.query("SELECT * FROM sales")
+        instr.summary()
+        """
+        self.window = window
+        self.slow_query_threshold = slow_query_threshold
+        self.explain = explain
+        self.hooks = list(hooks or [])
+        self.records = deque(maxlen=window)
+        self.slow_queries = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.engine = None
+        self.attach(engine)
+
+    def attach(self, engine) -> None:
+        """Starts listening to @engine (and stops listening to the previous one)"""
+        self.detach()
+        self.engine = engine
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def detach(self) -> None:
+        """Stops listening to the current engine"""
+        if self.engine is None:
+            return
+        event.remove(self.engine, "checkout", self._on_checkout)
+        event.remove(self.engine, "before_cursor_execute", self._before_execute)
+        event.remove(self.engine, "after_cursor_execute", self._after_execute)
+        self.engine = None
+
+    def add_hook(self, hook) -> None:
+        """Registers a callable that receives every record (a dict)"""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook) -> None:
+        self.hooks.remove(hook)
+
+    ##----- Engine events
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        op = getattr(self._local, "operation", None)
+        if op is not None and op["pool_wait_s"] is None:
+            op["pool_wait_s"] = time.perf_counter() - op["_start"]
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(self._local, "suspended", False):
+            return
+        self._local.execute_start = time.perf_counter()
+        op = getattr(self._local, "operation", None)
+        if op is not None and op["connect_s"] is None:
+            op["connect_s"] = self._local.execute_start - op["_start"]
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(self._local, "execute_start", None)
+        if start is None or getattr(self._local, "suspended", False):
+            return
+        self._local.execute_start = None
+        now = time.perf_counter()
+        elapsed = now - start
+        op = getattr(self._local, "operation", None)
+        if op is not None:
+            op["execute_s"] += elapsed
+            op["statements"] += 1
+            op["_last_execute"] = now
+            return
+        rowcount = getattr(cursor, "rowcount", -1)
+        self._emit(
+            {
+                "operation": "statement",
+                "statement": statement,
+                "started": time.time() - elapsed,
+                "total_s": elapsed,
+                "pool_wait_s": None,
+                "connect_s": None,
+                "execute_s": elapsed,
+                "fetch_s": None,
+                "to_sql_s": None,
+                "rows": rowcount if rowcount is not None and rowcount >= 0 else None,
+                "bytes": None,
+                "statements": 1,
+                "error": None,
+            }
+        )
+
+    ##----- Operations
+    @contextmanager
+    def track(self, operation: str, statement, params=None):
+        """
+        Times a DataConnector operation ("query" or "insert") on the current
+        thread. The yielded record can be given "rows"/"bytes" or a
+        "result" DataFrame to measure.
+        """
+        record = {
+            "operation": operation,
+            "statement": str(statement),
+            "started": time.time(),
+            "total_s": None,
+            "pool_wait_s": None,
+            "connect_s": None,
+            "execute_s": 0.0,
+            "fetch_s": None,
+            "to_sql_s": None,
+            "rows": None,
+            "bytes": None,
+            "statements": 0,
+            "error": None,
+            "_start": time.perf_counter(),
+            "_last_execute": None,
+        }
+        outer = getattr(self._local, "operation", None)
+        self._local.operation = record
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            self._local.operation = outer
+            end = time.perf_counter()
+            record["total_s"] = end - record.pop("_start")
+            last_execute = record.pop("_last_execute")
+            result = record.pop("result", None)
+            if result is not None:
+                record["rows"] = len(result)
+                record["bytes"] = _frame_bytes(result)
+            if operation == "query" and last_execute is not None:
+                record["fetch_s"] = end - last_execute
+            elif operation == "insert":
+                record["to_sql_s"] = max(
+                    0.0, record["total_s"] - (record["connect_s"] or 0.0) - record["execute_s"]
+                )
+            self._finish(record, statement, params)
+
+    def _finish(self, record: dict, statement, params) -> None:
+        threshold = self.slow_query_threshold
+        if threshold is not None and record["total_s"] >= threshold:
+            if self.explain and record["operation"] == "query" and record["error"] is None:
+                record["explain"] = self.explain_plan(statement, params)
+            with self._lock:
+                self.slow_queries.append(record)
+            logger.warning(
+                "Slow %s (%.3fs): %s%s",
+                record["operation"],
+                record["total_s"],
+                record["statement"],
+                f"\n{record['explain']}" if record.get("explain") else "",
+            )
+        self._emit(record)
+
+    def _emit(self, record: dict) -> None:
+        with self._lock:
+            self.records.append(record)
+        for hook in list(self.hooks):
+            try:
+                hook(record)
+            except Exception as e:
+                print(f"Instrumentation hook failed: {str(e)}")
+
+    def explain_plan(self, statement, params=None) -> str:
+        """Returns the plan of @statement on the current engine (None if unsupported)"""
+        prefix = EXPLAIN_PREFIXES.get(self.engine.dialect.name)
+        if prefix is None:
+            return None
+        self._local.suspended = True
+        try:
+            with self.engine.connect() as conn:
+                if isinstance(statement, str):
+                    rows = conn.exec_driver_sql(prefix + statement, params or ()).all()
+                else:
+                    rows = conn.execute(text(prefix + str(statement)), params or {}).all()
+            return "\n".join(" ".join(str(value) for value in row) for row in rows)
+        except Exception as e:
+            print(f"Could not capture the query plan: {str(e)}")
+            return None
+        finally:
+            self._local.suspended = False
+
+    ##----- Reporting
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns rolling statistics of the recorded window per operation:
+        counts, errors, total time percentiles, mean phase timings, rows and bytes
+        """
+        with self._lock:
+            records = pd.DataFrame(list(self.records))
+        if records.empty:
+            return pd.DataFrame()
+        numeric = ["total_s"] + PHASES + ["rows", "bytes"]
+        records[numeric] = records[numeric].astype("float64")
+        grouped = records.groupby("operation")
+        summary = pd.DataFrame(
+            {
+                "count": grouped.size(),
+                "errors": grouped["error"].count(),
+                "total_s": grouped["total_s"].sum(),
+                "mean_s": grouped["total_s"].mean(),
+                "p50_s": grouped["total_s"].quantile(0.5),
+                "p95_s": grouped["total_s"].quantile(0.95),
+                "max_s": grouped["total_s"].max(),
+            }
+        )
+        for phase in PHASES:
+            summary[f"mean_{phase}"] = grouped[phase].mean()
+        summary["rows"] = grouped["rows"].sum(min_count=1)
+        summary["bytes"] = grouped["bytes"].sum(min_count=1)
+        return summary
+
+    def reset(self) -> None:
+        """Clears the recorded window and slow query log"""
+        with self._lock:
+            self.records.clear()
+            self.slow_queries.clear()
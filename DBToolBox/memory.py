@@ -0,0 +1,123 @@
+"""Memory budgets for the streamed query and insert paths"""
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from DBToolBox.EDA import memory_report
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when a reservation does not fit in the remaining budget"""
+
+
+class MemoryBudget:
+    def __init__(self, max_mb: float, sample_size: int = 1000):
+        """
+        Description:
+
+        Tracks the (deep) memory held by DataFrames against a fixed budget,
+        so streamed reads and writes can size their chunks to fit it, or
+        spill to disk, instead of growing until the process is OOM-killed.
+        Sizes are measured with EDA.memory_report, sampling @sample_size
+        values of object columns. A budget can be shared between threads.
+
+        @max_mb: The budget in MB
+
+        Usage:
+
+        budget = MemoryBudget(max_mb=512)
+        for chunk in dc.iter_query("SELECT * FROM big_table", memory_budget=budget):
+            process(chunk)  # chunks are sized to fit the budget
+
+        with budget.hold(df):
+            ...  # raises MemoryBudgetExceeded if df does not fit
+        """
+        self.limit = int(max_mb * 10**6)
+        self.sample_size = sample_size
+        self.used = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        """Returns the number of bytes left in the budget"""
+        return self.limit - self.used
+
+    def measure(self, df: pd.DataFrame) -> int:
+        """Returns the deep memory usage of the DataFrame in bytes"""
+        return int(memory_report(df, sample_size=self.sample_size)["bytes"].sum())
+
+    def _size(self, data) -> int:
+        return data if isinstance(data, int) else self.measure(data)
+
+    def fits(self, data) -> bool:
+        """Returns True if the DataFrame (or number of bytes) fits in the remaining budget"""
+        return self._size(data) <= self.remaining
+
+    def reserve(self, data) -> int:
+        """
+        Reserves the size of the DataFrame (or number of bytes) and returns
+        it. Raises MemoryBudgetExceeded if it does not fit.
+        """
+        size = self._size(data)
+        with self._lock:
+            if self.used + size > self.limit:
+                raise MemoryBudgetExceeded(
+                    f"{size} bytes do not fit in the memory budget "
+                    f"({self.limit - self.used} of {self.limit} bytes left)"
+                )
+            self.used += size
+            self.peak = max(self.peak, self.used)
+        return size
+
+    def release(self, size: int) -> None:
+        """Returns a reservation made with reserve to the budget"""
+        with self._lock:
+            self.used = max(0, self.used - size)
+
+    @contextmanager
+    def hold(self, data):
+        """Reserves the DataFrame (or number of bytes) for the duration of the block"""
+        size = self.reserve(data)
+        try:
+            yield size
+        finally:
+            self.release(size)
+
+    def rows_per_chunk(self, df: pd.DataFrame, fraction: float = 1.0) -> int:
+        """
+        Returns how many rows of the DataFrame fit in @fraction of the
+        remaining budget, based on its average (deep) size per row
+        """
+        if len(df) == 0:
+            return 1
+        row_bytes = max(1.0, self.measure(df) / len(df))
+        return max(1, int(self.remaining * fraction // row_bytes))
+
+
+def coalesce_chunks(chunks, budget: MemoryBudget, ignore_index: bool = True):
+    """
+    Combines an iterable of DataFrame chunks into the largest frames that
+    fit in the memory budget. The rows of a frame stay reserved until the
+    next one is requested, and its source chunks are released before it is
+    yielded. Raises MemoryBudgetExceeded if a single chunk does not fit
+    (read with a smaller chunksize).
+    """
+    pending, reserved = [], 0
+    try:
+        for chunk in chunks:
+            size = budget.measure(chunk)
+            if pending and not budget.fits(size):
+                frame = pd.concat(pending, ignore_index=ignore_index)
+                pending = []
+                yield frame
+                del frame
+                budget.release(reserved)
+                reserved = 0
+            reserved += budget.reserve(size)
+            pending.append(chunk)
+        if pending:
+            frame = pd.concat(pending, ignore_index=ignore_index)
+            pending = chunk = None
+            yield frame
+    finally:
+        budget.release(reserved)
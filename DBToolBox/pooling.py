@@ -0,0 +1,252 @@
+"""Connection pool configuration and monitoring helpers"""
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event, exc
+
+
+def _to_bool(value) -> bool:
+    """Converts a configuration value (e.g. "true", "0", True) to a boolean"""
+    if isinstance(value, str):
+        if value.strip().lower() in ("1", "true", "yes", "on"):
+            return True
+        if value.strip().lower() in ("0", "false", "no", "off", ""):
+            return False
+        raise ValueError(f"Invalid boolean value: {value}")
+    return bool(value)
+
+
+# Maps DataConnector configuration keys to create_engine pool arguments
+POOL_SETTINGS = {
+    "DBC_POOL_SIZE": ("pool_size", int),
+    "DBC_MAX_OVERFLOW": ("max_overflow", int),
+    "DBC_POOL_TIMEOUT": ("pool_timeout", float),
+    "DBC_POOL_RECYCLE": ("pool_recycle", int),
+    "DBC_POOL_PRE_PING": ("pool_pre_ping", _to_bool),
+    "DBC_POOL_USE_LIFO": ("pool_use_lifo", _to_bool),
+}
+
+
+def pool_options(config: dict) -> dict:
+    """
+    Returns the create_engine pool arguments defined in the given
+    configuration (see POOL_SETTINGS). Settings that are not present
+    are left to SQLAlchemy's defaults.
+    """
+    options = {}
+    for key, (argument, convert) in POOL_SETTINGS.items():
+        value = config.get(key)
+        if value is None or value == "":
+            continue
+        try:
+            options[argument] = convert(value)
+        except (TypeError, ValueError):
+            print(f"Invalid value for {key}: {value}")
+            raise
+    return options
+
+
+class PoolMonitor:
+    """
+    Collects connection pool metrics for a SQLAlchemy engine: checkouts,
+    checked-out vs. idle connections, new connections, overflow events,
+    checkout timeouts and the time spent waiting for a checkout.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.reset()
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "connect", self._on_connect)
+        # Engine.connect() (and pandas) acquire connections through
+        # raw_connection, so timing it captures the full checkout wait
+        raw_connection = engine.raw_connection
+
+        def timed_raw_connection(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return raw_connection(*args, **kwargs)
+            except exc.TimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                raise
+            finally:
+                self._record_wait(time.perf_counter() - start)
+
+        engine.raw_connection = timed_raw_connection
+
+    def reset(self) -> None:
+        """Resets all counters"""
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connections_created = 0
+            self.overflow_events = 0
+            self.timeouts = 0
+            self.waits = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        pool = self.engine.pool
+        with self._lock:
+            self.connections_created += 1
+            if hasattr(pool, "overflow") and pool.overflow() > 0:
+                self.overflow_events += 1
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the pool metrics"""
+        pool = self.engine.pool
+        with self._lock:
+            checked_out = (
+                pool.checkedout()
+                if hasattr(pool, "checkedout")
+                else max(self.checkouts - self.checkins, 0)
+            )
+            return {
+                "pool_class": type(pool).__name__,
+                "pool_size": pool.size() if callable(getattr(pool, "size", None)) else None,
+                "checked_out": checked_out,
+                "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "checkouts": self.checkouts,
+                "connections_created": self.connections_created,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "wait_time_total": round(self.wait_time_total, 6),
+                "wait_time_max": round(self.wait_time_max, 6),
+                "wait_time_avg": round(self.wait_time_total / self.waits, 6)
+                if self.waits
+                else 0.0,
+            }
+
+
+class RawConnectionPool:
+    def __init__(
+        self,
+        minconn: int = 1,
+        maxconn: int = 10,
+        timeout: float = None,
+        validate: bool = True,
+        **connect_kwargs,
+    ):
+        """
+        Description:
+
+        A thread-safe pool of raw psycopg2 connections, backed by
+        psycopg2.pool.ThreadedConnectionPool. At most @maxconn connections
+        are open at once: callers wait (up to @timeout seconds) for a free
+        connection instead of failing. Connections are checked with a
+        `SELECT 1` on checkout (if @validate) and replaced when broken.
+
+        @connect_kwargs: Arguments for psycopg2.connect (user, password,
+                         host, port, dbname, ...)
+
+        Usage:
+
+        pool = RawConnectionPool(maxconn=8, host="db", dbname="sales", user="me", password="pwd")
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+        pool.close()
+        """
+        from psycopg2 import pool
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate = validate
+        self._pool = pool.ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.replaced = 0
+
+    def _is_alive(self, connection) -> bool:
+        """Returns True if the connection answers a trivial query"""
+        import psycopg2
+
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cur:
+                cur.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def getconn(self):
+        """
+        Checks out a (validated) connection, waiting for a free slot.
+        Return it with putconn, or use the connection() context manager.
+        """
+        from psycopg2 import pool
+
+        if not self._slots.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise pool.PoolError(
+                f"No connection became available within {self.timeout} seconds"
+            )
+        try:
+            connection = self._pool.getconn()
+            # Every pooled connection may have gone stale: replace until one answers
+            for _ in range(self.maxconn):
+                if not self.validate or self._is_alive(connection):
+                    break
+                self._pool.putconn(connection, close=True)
+                with self._lock:
+                    self.replaced += 1
+                connection = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+        return connection
+
+    def putconn(self, connection, close: bool = False) -> None:
+        """Returns a connection to the pool (closing it if it is broken or @close)"""
+        try:
+            self._pool.putconn(connection, close=close or bool(connection.closed))
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Yields a pooled connection. Like `with psycopg2_connection:`, the
+        transaction is committed if the block succeeds and rolled back if it
+        raises; the connection then goes back to the pool.
+        """
+        connection = self.getconn()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            if not connection.closed:
+                connection.rollback()
+            raise
+        finally:
+            self.putconn(connection)
+
+    def close(self) -> None:
+        """Closes every connection of the pool"""
+        self._pool.closeall()
@@ -0,0 +1,316 @@
+"""
+Out-of-core column profiling with mergeable sketches.
+
+Profiles are built from an iterator of DataFrame chunks (e.g. the output of
+pd.read_sql(chunksize=...), DataConnector.iter_query or pd.read_csv(chunksize=...))
+and only keep a small, fixed amount of state per column, so tables of any size
+can be profiled. Partial profiles built by parallel workers can be merged.
+
+Exact fields: row counts, null counts, min and max.
+
+Approximate fields:
+- cardinality: exact while a column has at most `exact_limit` distinct values,
+  then estimated with a HyperLogLog sketch of 2**precision registers, whose
+  relative standard error is 1.04 / sqrt(2**precision) (about 0.81% for the
+  default precision of 14; estimates fall within 3 standard errors, ~2.4%,
+  with over 99% probability).
+- top_values: the most frequent values with Misra-Gries counts. With a
+  capacity of k counters over n non-null values, every reported count
+  under-estimates the true count by at most n / (k + 1), and every value
+  that occurs more than n / (k + 1) times is guaranteed to be reported.
+"""
+import heapq
+import numpy as np
+import pandas as pd
+
+# The get_column_info columns followed by the extra profile fields
+PROFILE_COLUMNS = [
+    "column_name",
+    "cardinality",
+    "dtype",
+    "cardinality_rating",
+    "variable_type",
+    "cardinality_pct",
+    "nulls",
+    "null_pct",
+    "cardinality_exact",
+    "min",
+    "max",
+    "top_values",
+]
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Returns the bit length of every uint64 value (0 for 0)"""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    # frexp is exact for 32-bit integers: x = m * 2**e with 0.5 <= m < 1
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+class HyperLogLog:
+    """A mergeable HyperLogLog distinct-count sketch over 64-bit hashes"""
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """Adds an array of uint64 hashes to the sketch"""
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        remaining = 64 - self.precision
+        index = (hashes >> np.uint64(remaining)).astype(np.int64)
+        rest = hashes & np.uint64((1 << remaining) - 1)
+        rank = (remaining - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Merges another sketch (of the same precision) into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Only sketches of the same precision can be merged")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        """Returns the estimated number of distinct hashes added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class MisraGries:
+    """A mergeable frequent-items summary holding at most `capacity` counters"""
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counters = {}
+
+    def _prune(self) -> None:
+        """Keeps the summary within capacity by subtracting the (capacity+1)-th count"""
+        if len(self.counters) <= self.capacity:
+            return
+        cutoff = heapq.nlargest(self.capacity + 1, self.counters.values())[-1]
+        self.counters = {
+            value: count - cutoff
+            for value, count in self.counters.items()
+            if count > cutoff
+        }
+
+    def add_counts(self, counts: dict) -> None:
+        """Adds value counts (e.g. from Series.value_counts) to the summary"""
+        for value, count in counts.items():
+            self.counters[value] = self.counters.get(value, 0) + int(count)
+        self._prune()
+
+    def merge(self, other: "MisraGries") -> None:
+        """Merges another summary into this one"""
+        self.add_counts(other.counters)
+
+    def top(self, k: int) -> list:
+        """Returns the (value, count) pairs of the k most frequent values"""
+        return heapq.nlargest(k, self.counters.items(), key=lambda item: item[1])
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    """
+    Returns a uint64 hash of every (non-null) value. Integral floats hash like
+    the equivalent integers, so a column read as int64 in one chunk and as
+    float64 in another (because of nulls) is counted consistently.
+    """
+    if values.dtype.kind != "f":
+        return pd.util.hash_pandas_object(values, index=False).to_numpy()
+    # Adding 0.0 folds -0.0 into 0.0
+    floats = values.to_numpy(dtype=np.float64) + 0.0
+    integral = (floats == np.trunc(floats)) & (np.abs(floats) < 2.0**63)
+    hashes = np.empty(len(floats), dtype=np.uint64)
+    hashes[integral] = pd.util.hash_array(floats[integral].astype(np.int64))
+    hashes[~integral] = pd.util.hash_array(floats[~integral])
+    return hashes
+
+
+def _common_dtype(first, second):
+    """Returns a dtype that can hold the values of both dtypes"""
+    if first is None or first == second:
+        return second
+    try:
+        return np.promote_types(first, second)
+    except TypeError:
+        return np.dtype(object)
+
+
+def _smallest(first, second, largest: bool = False):
+    """Returns the smaller (or larger) of two values, ignoring None"""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    try:
+        if largest:
+            return second if second > first else first
+        return second if second < first else first
+    except TypeError:
+        return first
+
+
+class ColumnProfile:
+    """The mergeable profile state of a single column"""
+
+    def __init__(self, precision: int = 14, exact_limit: int = 1024, top_capacity: int = 100):
+        self.rows = 0
+        self.nulls = 0
+        self.dtype = None
+        self.min = None
+        self.max = None
+        self.exact_limit = exact_limit
+        self.exact = np.array([], dtype=np.uint64)
+        self.hll = HyperLogLog(precision)
+        self.top = MisraGries(top_capacity)
+
+    def update(self, column: pd.Series) -> None:
+        """Adds a chunk of the column to the profile"""
+        self.rows += len(column)
+        self.dtype = _common_dtype(self.dtype, column.dtype)
+        values = column.dropna()
+        self.nulls += len(column) - len(values)
+        if values.empty:
+            return
+        try:
+            self.min = _smallest(self.min, values.min())
+            self.max = _smallest(self.max, values.max(), largest=True)
+        except TypeError:
+            # Mixed, unorderable values
+            pass
+        hashes = _hash_values(values)
+        self.hll.add_hashes(hashes)
+        if self.exact is not None:
+            self.exact = np.union1d(self.exact, hashes)
+            if len(self.exact) > self.exact_limit:
+                self.exact = None
+        self.top.add_counts(values.value_counts(sort=False).to_dict())
+
+    def merge(self, other: "ColumnProfile") -> None:
+        """Merges the profile of the same column from another worker"""
+        self.rows += other.rows
+        self.nulls += other.nulls
+        if other.dtype is not None:
+            self.dtype = _common_dtype(self.dtype, other.dtype)
+        self.min = _smallest(self.min, other.min)
+        self.max = _smallest(self.max, other.max, largest=True)
+        self.hll.merge(other.hll)
+        if self.exact is not None and other.exact is not None:
+            self.exact = np.union1d(self.exact, other.exact)
+            if len(self.exact) > self.exact_limit:
+                self.exact = None
+        else:
+            self.exact = None
+        self.top.merge(other.top)
+
+    @property
+    def cardinality(self) -> int:
+        if self.exact is not None:
+            return len(self.exact)
+        return self.hll.estimate()
+
+
+class StreamingProfiler:
+    def __init__(
+        self,
+        precision: int = 14,
+        exact_limit: int = 1024,
+        top_k: int = 5,
+        top_capacity: int = 100,
+    ):
+        """
+        Description:
+
+        Builds a get_column_info-style profile from a stream of DataFrame
+        chunks while keeping only fixed-size state per column (see the
+        module docstring for the error bounds of the approximate fields).
+
+        @precision: HyperLogLog precision (2**precision registers per column)
+        @exact_limit: Distinct values counted exactly before switching to HyperLogLog
+        @top_k: Number of top values reported per column
+        @top_capacity: Misra-Gries counters kept per column (>= top_k)
+
+        Usage:
+
+        profiler = StreamingProfiler()
+        for chunk in dc.iter_query("SELECT * FROM big_table", chunksize=100000):
+            profiler.update(chunk)
+        summary = profiler.result()
+
+        # Profiles from parallel workers can be combined
+        profiler.merge(other_profiler)
+        """
+        self.precision = precision
+        self.exact_limit = exact_limit
+        self.top_k = top_k
+        self.top_capacity = max(top_capacity, top_k)
+        self.columns = {}
+
+    def _column(self, name) -> ColumnProfile:
+        if name not in self.columns:
+            self.columns[name] = ColumnProfile(
+                self.precision, self.exact_limit, self.top_capacity
+            )
+        return self.columns[name]
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingProfiler":
+        """Adds a DataFrame chunk to the profile"""
+        for name in chunk.columns:
+            self._column(name).update(chunk[name])
+        return self
+
+    def merge(self, other: "StreamingProfiler") -> "StreamingProfiler":
+        """Merges a partial profile (built with the same settings) into this one"""
+        for name, profile in other.columns.items():
+            self._column(name).merge(profile)
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns the profile in the same format as EDA.get_column_info, plus
+        whether the cardinality is exact, the min/max and the top values
+        """
+        records = []
+        for name, profile in self.columns.items():
+            cardinality = profile.cardinality
+            rows = profile.rows
+            records.append(
+                {
+                    "column_name": name,
+                    "cardinality": cardinality,
+                    "dtype": profile.dtype,
+                    "cardinality_rating": "HIGH" if cardinality > 19 else "LOW",
+                    "variable_type": "Categorical"
+                    if profile.dtype == "object"
+                    else "Numeric",
+                    "cardinality_pct": round(cardinality / rows, 4) if rows else np.nan,
+                    "nulls": profile.nulls,
+                    "null_pct": round(profile.nulls / rows, 4) if rows else np.nan,
+                    "cardinality_exact": profile.exact is not None,
+                    "min": profile.min,
+                    "max": profile.max,
+                    "top_values": profile.top.top(self.top_k),
+                }
+            )
+        return pd.DataFrame(records, columns=PROFILE_COLUMNS)
+
+
+def profile_chunks(chunks, **kwargs) -> pd.DataFrame:
+    """
+    Profiles an iterable of DataFrame chunks and returns the summary frame.
+    Keyword arguments are passed on to StreamingProfiler.
+    """
+    profiler = StreamingProfiler(**kwargs)
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler.result()
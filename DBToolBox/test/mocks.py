@@ -30,3 +30,106 @@ CONNECTION_STRING_STANDARD_MOCK = (
 CONNECTION_STRING_DBC_URL_MOCK = "database:connection.string"
 MOCK_DF = pd.DataFrame({"test1": [1, 2, 3, 4], "test2": ["a", "b", "c", "d"]})
 CONFIG_INMEMORY_ENGINE = {"DBC_URL": "sqlite://"}
+
+
+class MockCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        from psycopg2 import OperationalError
+
+        if self.connection.broken:
+            self.connection.closed = 2
+            raise OperationalError("server closed the connection unexpectedly")
+
+
+class MockConnection:
+    """A psycopg2-like connection recording commits and rollbacks"""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.closed = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return MockCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class MockThreadedConnectionPool:
+    """
+    Stands in for psycopg2.pool.ThreadedConnectionPool. The first
+    @broken connections it hands out are dead.
+    """
+
+    broken = 0
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.kwargs = kwargs
+        self.idle = [MockConnection(broken=True) for _ in range(self.broken)]
+        self.opened = 0
+        self.discarded = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop(0)
+        self.opened += 1
+        return MockConnection()
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.close()
+            self.discarded.append(conn)
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        for conn in self.idle:
+            conn.close()
+
+
+def sqlite_copy_rows(cursor, table, columns, rows, schema=None):
+    """
+    Stands in for bulk.copy_rows on SQLite: parses the COPY payload the way
+    PostgreSQL does (unquoted \\N is NULL, quoted fields are strings) and
+    rejects non-integer text for INTEGER columns
+    """
+    import re
+    from DBToolBox import bulk
+
+    types = {row[1]: row[2].upper() for row in cursor.execute(f'PRAGMA table_info("{table}")')}
+    field = re.compile(r'(?:"((?:[^"]|"")*)"|([^,]*)),')
+    records = []
+    for line in bulk.CSVRowStream(rows).read().splitlines():
+        values = []
+        for col, match in zip(columns, field.finditer(line + ",")):
+            quoted, raw = match.group(1), match.group(2)
+            if quoted is not None:
+                value = quoted.replace('""', '"')
+            elif raw == bulk.COPY_NULL:
+                value = None
+            else:
+                value = raw
+            if value is not None and types.get(col) == "INTEGER" and not re.fullmatch(r"-?\d+", value):
+                raise ValueError(f'invalid input syntax for type integer: "{value}"')
+            values.append(value)
+        records.append(values)
+    placeholders = ", ".join("?" for _ in columns)
+    cursor.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', records)
+    return len(records)
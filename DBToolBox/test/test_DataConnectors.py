@@ -1,6 +1,14 @@
 from psycopg2 import OperationalError
+import subprocess
+import sys
+import time
+import types
 import pytest
+import pandas as pd
+from sqlalchemy import create_engine
 import DBToolBox.DataConnectors as dc
+from DBToolBox.DBConnector import DataConnector
+from DBToolBox.test import mocks
 
 
 @pytest.fixture
@@ -27,3 +35,271 @@ def test_db_connection_config(mock_config):
             port=mock_config["PORT"],
             dbname=mock_config["DB"],
         )
+
+
+# Test iter_query_db
+def test_iter_query_db():
+    """
+    Tests that iter_query_db yields chunks over a given connection
+    and leaves that connection open
+    """
+    engine = create_engine("sqlite://")
+    mocks.MOCK_DF.to_sql("test", engine, index=False)
+    with engine.connect() as conn:
+        chunks = list(dc.iter_query_db("SELECT * FROM test", connection=conn, chunksize=3))
+        assert not conn.closed
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), mocks.MOCK_DF)
+
+
+def test_query_db_chunksize():
+    """
+    Tests that query_db returns a lazy generator of DataFrames when chunksize is set
+    """
+    engine = create_engine("sqlite://")
+    mocks.MOCK_DF.to_sql("test", engine, index=False)
+    with engine.connect() as conn:
+        result = dc.query_db("SELECT * FROM test", connection=conn, chunksize=2)
+        assert isinstance(result, types.GeneratorType)
+        assert [len(chunk) for chunk in result] == [2, 2]
+
+
+# Test the engine registry
+@pytest.fixture
+def engine_registry(monkeypatch, mock_config):
+    monkeypatch.setattr(dc, "config", mock_config)
+    yield
+    dc.dispose_all()
+
+
+def test_get_alchemy_engine_cached(engine_registry):
+    """
+    Tests that get_alchemy_engine reuses one engine per server and engine options
+    """
+    engine = dc.get_alchemy_engine("host1")
+    assert dc.get_alchemy_engine("host1") is engine
+    assert dc.get_alchemy_engine_db() is dc.get_alchemy_engine("database.host.name")
+    assert dc.get_alchemy_engine("host2") is not engine
+    assert dc.get_alchemy_engine("host1", pool_size=2) is not engine
+
+
+def test_dispose_engine(engine_registry):
+    """
+    Tests that dispose_engine only removes the engines for the given URL
+    """
+    engine = dc.get_alchemy_engine("host1")
+    dc.get_alchemy_engine("host1", pool_size=2)
+    other = dc.get_alchemy_engine("host2")
+    assert dc.dispose_engine(engine) == 2
+    assert dc.get_alchemy_engine("host1") is not engine
+    assert dc.get_alchemy_engine("host2") is other
+    assert dc.dispose_all() == 2
+    assert dc.get_alchemy_engine("host2") is not other
+
+
+# Test lazy imports and configuration
+def test_import_is_lazy():
+    """
+    Tests that importing DataConnectors and EDA does not load heavy dependencies
+    or read the .env file
+    Pass Condition: Only the expected modules are loaded and the config is unread
+    Fail Condition: pandas/SQLAlchemy/psycopg2/matplotlib are imported eagerly
+    """
+    probe = (
+        "import sys; import DBToolBox.DataConnectors as dc; "
+        "print(sorted(m for m in ('pandas', 'sqlalchemy', 'psycopg2', 'matplotlib') "
+        "if m in sys.modules), dc.config._values); "
+        "import DBToolBox.EDA; print('matplotlib' in sys.modules)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    assert output == ["[] None", "False"]
+
+
+def test_config_loaded_on_access(tmp_path, monkeypatch):
+    """
+    Tests that the configuration is read from the working directory on first access
+    """
+    (tmp_path / ".env").write_text("SERVER=lazy.host\n")
+    monkeypatch.chdir(tmp_path)
+    config = dc._EnvConfig()
+    assert config["SERVER"] == "lazy.host"
+    assert dict(config) == {"SERVER": "lazy.host"}
+
+
+# Test the raw connection pools
+@pytest.fixture
+def raw_pools(monkeypatch, mock_config):
+    from psycopg2 import pool
+
+    monkeypatch.setattr(dc, "config", mock_config)
+    monkeypatch.setattr(pool, "ThreadedConnectionPool", mocks.MockThreadedConnectionPool)
+    yield
+    dc.close_connection_pools()
+
+
+def test_pooled_connection_reused(raw_pools):
+    """
+    Tests that pooled connections are returned to the pool and reused
+    Pass Condition: Two checkouts share one connection, committed after each block
+    Fail Condition: A new connection is opened per checkout
+    """
+    with dc.pooled_connect_db() as first:
+        pass
+    with dc.pooled_connect_db() as second:
+        pass
+    assert first is second and first.commits == 2
+    pool = dc.get_connection_pool("username", "password", "database.host.name", 1234, "databasename")
+    assert pool._pool.opened == 1 and pool.in_use == 0
+    assert pool._pool.kwargs["host"] == "database.host.name"
+    assert dc.close_connection_pools() == 1
+
+
+def test_pooled_connection_rollback(raw_pools):
+    """
+    Tests that a failing block rolls back and still returns the connection
+    """
+    with pytest.raises(ValueError):
+        with dc.pooled_connect_db() as conn:
+            raise ValueError("task failed")
+    assert conn.commits == 0 and conn.rollbacks >= 1
+    with dc.pooled_connect_db() as again:
+        assert again is conn
+
+
+def test_pooled_connection_validation(raw_pools, monkeypatch):
+    """
+    Tests that broken connections are discarded on checkout
+    Pass Condition: Stale connections are closed and replaced by a live one
+    Fail Condition: A broken connection is handed out
+    """
+    monkeypatch.setattr(mocks.MockThreadedConnectionPool, "broken", 2)
+    with dc.pooled_connect_db() as conn:
+        assert not conn.broken
+    pool = dc.get_connection_pool("username", "password", "database.host.name", 1234, "databasename")
+    assert pool.replaced == 2 and len(pool._pool.discarded) == 2
+
+
+def test_pooled_connection_max_connections(raw_pools):
+    """
+    Tests that checkouts beyond maxconn wait and then time out
+    """
+    from psycopg2.pool import PoolError
+
+    with dc.pooled_connect_db(maxconn=1, timeout=0.05):
+        with pytest.raises(PoolError):
+            with dc.pooled_connect_db(maxconn=1, timeout=0.05):
+                pass
+    # The slot is free again once the first connection is returned
+    with dc.pooled_connect_db(maxconn=1, timeout=0.05):
+        pass
+
+
+def test_connection_pool_key(raw_pools):
+    """
+    Tests that pools are shared per server and credentials, with consistent sizing
+    Pass Condition: A different password gets its own pool and conflicting sizes are rejected
+    Fail Condition: A wrong password reuses the pool or a second pool is sized differently
+    """
+    server = ("database.host.name", 1234, "databasename")
+    pool = dc.get_connection_pool("username", "password", *server, maxconn=5)
+    assert dc.get_connection_pool("username", "password", *server) is pool
+    assert dc.get_connection_pool("username", "password", *server, maxconn=5) is pool
+    other = dc.get_connection_pool("username", "rotated", *server)
+    assert other is not pool and other._pool.kwargs["password"] == "rotated"
+    with pytest.raises(ValueError):
+        dc.get_connection_pool("username", "password", *server, maxconn=20)
+    with pytest.raises(ValueError):
+        dc.get_connection_pool("username", "password", *server, timeout=1)
+
+
+# Test fan-out queries
+class SlowConnector:
+    """A DataConnector stand-in that answers (or raises @df) after @delay seconds"""
+
+    def __init__(self, delay, df=None):
+        self.delay = delay
+        self.df = mocks.MOCK_DF if df is None else df
+
+    def query(self, query, params=None):
+        time.sleep(self.delay)
+        if isinstance(self.df, Exception):
+            raise self.df
+        return self.df
+
+
+@pytest.fixture
+def shards(tmp_path):
+    connectors = []
+    for number in range(3):
+        connector = DataConnector({"DBC_URL": f"sqlite:///{tmp_path / f'shard{number}.db'}"})
+        connector.insert(mocks.MOCK_DF.assign(test1=mocks.MOCK_DF["test1"] * number), "test")
+        connectors.append(connector)
+    yield connectors
+    for connector in connectors:
+        connector.dispose_engine()
+
+
+def test_fan_out_query(shards):
+    """
+    Tests that fan_out_query concatenates the tagged results in target order
+    Pass Condition: 12 rows tagged shard0..shard2, a report entry per shard
+    Fail Condition: Missing, untagged or misordered rows
+    """
+    report = []
+    targets = {f"shard{number}": connector for number, connector in enumerate(shards)}
+    df = dc.fan_out_query("SELECT * FROM test ORDER BY test1", targets, report=report)
+    assert list(df.columns) == ["source", "test1", "test2"]
+    assert df["source"].tolist() == [f"shard{n}" for n in range(3) for _ in range(4)]
+    assert df["test1"].tolist() == [n * v for n in range(3) for v in (1, 2, 3, 4)]
+    assert sorted(entry["source"] for entry in report) == list(targets)
+    assert {entry["status"] for entry in report} == {"ok"}
+    # Cached connector results are not modified by the tagging
+    assert "source" not in shards[0].query("SELECT * FROM test ORDER BY test1").columns
+
+
+def test_fan_out_query_server_names(monkeypatch, shards):
+    """
+    Tests that server names are read through get_alchemy_engine
+    """
+    engines = {f"host{n}": connector.engine for n, connector in enumerate(shards)}
+    monkeypatch.setattr(dc, "get_alchemy_engine", engines.__getitem__)
+    df = dc.fan_out_query("SELECT * FROM test", ["host0", "host2"], source_column="server")
+    assert df.groupby("server")["test1"].sum().to_dict() == {"host0": 0, "host2": 20}
+
+
+def test_fan_out_query_partial_results(shards):
+    """
+    Tests that failing and slow targets are reported and skipped
+    Pass Condition: Only the healthy shard's rows are returned, well before
+                    the slow target finishes
+    Fail Condition: The call waits for the slow target or raises
+    """
+    report = []
+    targets = {"ok": shards[0], "slow": SlowConnector(2.0), "broken": SlowConnector(0, ValueError("no such table"))}
+    start = time.perf_counter()
+    df = dc.fan_out_query("SELECT * FROM test", targets, timeout=0.3, report=report)
+    assert time.perf_counter() - start < 1.5
+    assert df["source"].unique().tolist() == ["ok"]
+    statuses = {entry["source"]: entry["status"] for entry in report}
+    assert statuses == {"ok": "ok", "slow": "timeout", "broken": "error"}
+
+
+def test_fan_out_query_concurrent_stream():
+    """
+    Tests that targets run concurrently and stream results as they arrive
+    """
+    targets = {"slow": SlowConnector(0.4), "fast": SlowConnector(0.0)}
+    start = time.perf_counter()
+    frames = list(dc.fan_out_query("SELECT * FROM test", targets, stream=True))
+    assert time.perf_counter() - start < 0.7
+    assert [frame["source"].iloc[0] for frame in frames] == ["fast", "slow"]
+
+
+def test_fan_out_query_all_failed():
+    """
+    Tests that the first error is raised when no target returns a result
+    """
+    with pytest.raises(TimeoutError):
+        dc.fan_out_query("SELECT * FROM test", [SlowConnector(0.5)], timeout=0.05)
@@ -1,8 +1,10 @@
 import pytest
 import random
 import pandas as pd
+from unittest.mock import patch
 import DBToolBox.test.mocks as mocks
 from DBToolBox import EDA
+from DBToolBox.DBConnector import DataConnector
 
 # get_column_info tests
 def test_get_column_info():
@@ -25,6 +27,89 @@ def test_get_column_info():
     pd.testing.assert_frame_equal(result, mocks.COLUMN_INFO_MOCK)
 
 
+def test_get_column_info_mixed_dtypes():
+    """
+    Tests that get_column_info counts distinct values and nulls like nunique/isnull
+    for every kind of column
+    Pass Condition: The cardinality and null counts match pandas' per-column results
+    Fail Condition: Any count differs
+    """
+    test_df = pd.DataFrame(
+        {
+            "ints": [3, 1, 3, 2, 1],
+            "floats": [1.5, None, 1.5, 0.0, -0.0],
+            "bools": [True, False, True, True, True],
+            "dates": pd.to_datetime(["2022-01-01", None, "2022-01-01", "2022-01-02", None]),
+            "nullable": pd.array([1, None, 2, 2, None], dtype="Int64"),
+            "labels": ["a", None, "b", float("nan"), "a"],
+        }
+    )
+    result = EDA.get_column_info(test_df)
+    assert result["cardinality"].tolist() == test_df.nunique().tolist()
+    assert result["nulls"].tolist() == test_df.isnull().sum().tolist()
+
+
+# profile_table tests
+def test_profile_table():
+    """
+    Tests that profile_table computes the get_column_info summary on the server
+    Pass Condition: The shared columns match get_column_info and min/max/top values are correct
+    Fail Condition: Error or any summary value differs
+    """
+    random.seed(1)
+    test_df = pd.DataFrame(
+        {
+            "testcol1": random.choices([1, 2, 3, 4], k=20),
+            "testcol2": random.choices(
+                ["Test1", "Test2", "Test3", "Test4", "Test5", None], k=20
+            ),
+            "testcol3": [i for i in range(1, 21)],
+        }
+    )
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(test_df, table="test")
+    result = EDA.profile_table(dc, "test", top_k=2)
+    pd.testing.assert_frame_equal(
+        result[mocks.COLUMN_INFO_MOCK.columns], mocks.COLUMN_INFO_MOCK
+    )
+    values = [test_df[col].dropna() for col in test_df.columns]
+    assert result["min"].tolist() == [column.min() for column in values]
+    assert result["max"].tolist() == [column.max() for column in values]
+    expected_top = test_df["testcol1"].value_counts().head(2)
+    assert result.loc[0, "top_values"] == [(str(v), n) for v, n in expected_top.items()]
+
+
+def test_profile_table_sample_unsupported():
+    """
+    Tests that sampling is rejected for dialects without TABLESAMPLE
+    Pass Condition: ValueError is raised
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(mocks.MOCK_DF, table="test")
+    with pytest.raises(ValueError):
+        EDA.profile_table(dc, "test", sample_pct=10)
+
+
+# visualize_distribution tests
+def test_visualize_distribution_table():
+    """
+    Tests that visualize_distribution counts the top values in the database
+    and folds the rest into an "other" bucket
+    Pass Condition: The expected counts are plotted and returned
+    Fail Condition: Error or the counts are incorrect
+    """
+    test_df = pd.DataFrame({"city": list("aaabbcdd") + [None]})
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(test_df, table="test")
+    with patch.object(pd.Series, "plot") as plot:
+        result = EDA.visualize_distribution(dc, "city", table="test", top_k=2)
+    plot.assert_called_once_with(kind="bar")
+    assert result.to_dict() == {"a": 3, "b": 2, "other": 3}
+    with patch.object(pd.Series, "plot"):
+        local = EDA.visualize_distribution(test_df, "city", top_k=2)
+    assert local.to_dict() == result.to_dict()
+
+
 # get_cardinality tests
 def test_get_cardinality_01():
     """
@@ -68,3 +153,41 @@ def test_get_size_mb():
     """
     result = EDA.get_size_mb(mocks.COLUMN_INFO_MOCK)
     assert result == 0.001
+
+
+# compact_frame tests
+def test_compact_frame():
+    """
+    Tests that compact_frame downcasts numeric columns and categorizes low-cardinality text
+    Pass Condition: Columns have the expected compact dtypes and unchanged values
+    Fail Condition: A column keeps its wide dtype or its values change
+    """
+    test_df = pd.DataFrame(
+        {
+            "ints": [1, 2, 300, 4],
+            "floats": [0.5, 1.5, None, 2.0],
+            "precise": [0.1, 0.2, 0.3, 0.4],
+            "labels": ["a", "b", "a", None],
+        }
+    )
+    result = EDA.compact_frame(test_df)
+    assert result.dtypes.astype(str).tolist() == ["int16", "float32", "float64", "category"]
+    numeric = ["ints", "floats", "precise"]
+    pd.testing.assert_frame_equal(result[numeric].astype("float64"), test_df[numeric].astype("float64"))
+    assert result["labels"].dropna().tolist() == ["a", "b", "a"]
+
+
+def test_frame_compactor_chunks():
+    """
+    Tests that FrameCompactor keeps category codes and numeric widths consistent across chunks
+    Pass Condition: Later chunks extend the categories and widen the numeric dtype
+    Fail Condition: Category codes change between chunks or values overflow
+    """
+    compactor = EDA.FrameCompactor()
+    first = compactor.compact(pd.DataFrame({"n": [1, 2], "c": ["x", "y"]}))
+    second = compactor.compact(pd.DataFrame({"n": [1000, 3], "c": ["z", "x"]}))
+    assert first["n"].dtype == "int8"
+    assert second["n"].tolist() == [1000, 3]
+    assert list(first["c"].cat.categories) == ["x", "y"]
+    assert list(second["c"].cat.categories) == ["x", "y", "z"]
+    assert second["c"].cat.codes.tolist() == [2, 0]
@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+import pandas as pd
+from DBToolBox.AsyncDBConnector import AsyncDataConnector
+from DBToolBox.test import mocks
+
+
+@pytest.fixture
+def async_config(tmp_path):
+    return {"DBC_URL": f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"}
+
+
+##----- query/insert tests
+def test_async_insert_query(async_config):
+    """
+    Tests that AsyncDataConnector inserts a DataFrame and queries it back
+    Pass Condition: The queried data matches the inserted data
+    Fail Condition: Error or the data returned is not what is expected
+    """
+
+    async def run():
+        dc = AsyncDataConnector(async_config)
+        await dc.insert(mocks.MOCK_DF, table="test")
+        result = await dc.query("SELECT * FROM test")
+        await dc.dispose_engine()
+        return result
+
+    result = asyncio.run(run())
+    pd.testing.assert_frame_equal(result, mocks.MOCK_DF)
+
+
+def test_async_query_gather(async_config):
+    """
+    Tests that several queries can be awaited together with asyncio.gather
+    Pass Condition: Every query returns its own filtered result
+    Fail Condition: Error or the results are incorrect
+    """
+
+    async def run():
+        dc = AsyncDataConnector(async_config)
+        await dc.insert(mocks.MOCK_DF, table="test")
+        results = await asyncio.gather(
+            *(
+                dc.query("SELECT * FROM test WHERE test1 = :value", {"value": value})
+                for value in range(1, 5)
+            )
+        )
+        await dc.dispose_engine()
+        return results
+
+    results = asyncio.run(run())
+    assert [result["test2"].tolist() for result in results] == [["a"], ["b"], ["c"], ["d"]]
+
+
+def test_async_iter_query(async_config):
+    """
+    Tests that iter_query asynchronously yields chunks of the given size
+    """
+
+    async def run():
+        dc = AsyncDataConnector(async_config)
+        await dc.insert(mocks.MOCK_DF, table="test")
+        chunks = [chunk async for chunk in dc.iter_query("SELECT * FROM test", chunksize=3)]
+        await dc.dispose_engine()
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), mocks.MOCK_DF)
+
+
+##----- unsupported operations
+def test_async_sync_only_methods(async_config):
+    """
+    Tests that DataConnector operations without an async version fail clearly
+    Pass Condition: Every inherited public method is either overridden or raises
+                    NotImplementedError naming AsyncDataConnector
+    Fail Condition: A sync-only method runs against the AsyncEngine
+    """
+    import inspect
+    from DBToolBox.DBConnector import DataConnector
+
+    # Methods that do not touch the engine's connections
+    engine_free = {"generate_connection_string", "update_config", "pool_stats"}
+    dc = AsyncDataConnector(async_config)
+    for name, _ in inspect.getmembers(DataConnector, inspect.isfunction):
+        if name.startswith("_") or name in engine_free:
+            continue
+        assert name in AsyncDataConnector.__dict__, name
+        method = getattr(dc, name)
+        if not method.__qualname__.startswith("_sync_only"):
+            continue  # An async-aware override
+        with pytest.raises(NotImplementedError, match="AsyncDataConnector"):
+            method(mocks.MOCK_DF, "test")
+    assert {"upsert", "export", "instrument"} <= {
+        name for name, value in AsyncDataConnector.__dict__.items()
+        if getattr(value, "__qualname__", "").startswith("_sync_only")
+    }
+    asyncio.run(dc.dispose_engine())
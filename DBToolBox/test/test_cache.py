@@ -0,0 +1,133 @@
+import pandas as pd
+from sqlalchemy import create_engine
+from DBToolBox import DataConnectors
+from DBToolBox.cache import QueryCache, normalize_sql, referenced_tables
+from DBToolBox.DBConnector import DataConnector
+from DBToolBox.test import mocks
+
+
+def test_normalize_sql():
+    """
+    Tests that normalize_sql collapses whitespace outside of string literals
+    """
+    result = normalize_sql("SELECT  *\n  FROM test\tWHERE test2 = 'a  b' ;")
+    assert result == "SELECT * FROM test WHERE test2 = 'a  b'"
+
+
+def test_referenced_tables():
+    result = referenced_tables('SELECT * FROM public."Sales" s JOIN stores ON 1 = 1')
+    assert result == {"public.sales", "sales", "stores"}
+
+
+def test_referenced_tables_from_list():
+    """
+    Tests that every table of a comma-separated FROM list is referenced
+    Pass Condition: All aliased tables are found; unparseable queries match any table
+    Fail Condition: Only the first table of the list is found
+    """
+    result = referenced_tables("SELECT * FROM orders o, customers AS c WHERE o.id = c.id")
+    assert result == {"orders", "customers"}
+    result = referenced_tables("SELECT * FROM a JOIN b ON a.x = b.x LEFT JOIN c USING (x)")
+    assert result == {"a", "b", "c"}
+    assert referenced_tables("SELECT 1") == {"*"}
+    cache = QueryCache()
+    cache.put("SELECT * FROM orders o, customers c WHERE o.id = c.id", mocks.MOCK_DF)
+    cache.put("SELECT 1", mocks.MOCK_DF)
+    assert cache.invalidate("customers") == 2
+
+
+def test_cache_lru_eviction():
+    """
+    Tests that the memory tier evicts the least recently used entry
+    Pass Condition: The least recently used query misses and the others hit
+    Fail Condition: The wrong entry is evicted
+    """
+    cache = QueryCache(max_entries=2)
+    cache.put("SELECT 1", mocks.MOCK_DF)
+    cache.put("SELECT 2", mocks.MOCK_DF)
+    assert cache.get("SELECT  1") is not None
+    cache.put("SELECT 3", mocks.MOCK_DF)
+    assert cache.get("SELECT 2") is None
+    assert cache.get("SELECT 1") is not None
+    assert cache.get("SELECT 3") is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+
+
+def test_cache_ttl_and_params():
+    cache = QueryCache(ttl=60)
+    cache.put("SELECT * FROM test", mocks.MOCK_DF, params={"a": 1}, ttl=-1)
+    cache.put("SELECT * FROM test", mocks.MOCK_DF, params={"a": 2})
+    assert cache.get("SELECT * FROM test", params={"a": 1}) is None
+    result = cache.get("SELECT * FROM test", params={"a": 2})
+    pd.testing.assert_frame_equal(result, mocks.MOCK_DF)
+
+
+def test_cache_disk_tier(tmp_path):
+    """
+    Tests that results written to the disk tier are served to a new cache
+    and removed by table invalidation
+    Pass Condition: The second cache hits the disk tier until the table is invalidated
+    Fail Condition: Error, a miss before invalidation or a hit after it
+    """
+    QueryCache(disk_path=tmp_path).put("SELECT * FROM test", mocks.MOCK_DF, url="sqlite://")
+    cache = QueryCache(disk_path=tmp_path)
+    result = cache.get("SELECT * FROM test", url="sqlite://")
+    pd.testing.assert_frame_equal(result, mocks.MOCK_DF)
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.invalidate("other") == 0
+    assert cache.invalidate("public.test") == 1
+    assert QueryCache(disk_path=tmp_path).get("SELECT * FROM test", url="sqlite://") is None
+
+
+def test_dataconnector_query_cache():
+    """
+    Tests that DataConnector.query serves repeated queries from its cache
+    and that inserts invalidate the cached results of the table
+    """
+    cache = QueryCache()
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE, cache=cache)
+    dc.insert(mocks.MOCK_DF, table="test")
+    dc.query("SELECT * FROM test")
+    result = dc.query("SELECT * FROM test")
+    pd.testing.assert_frame_equal(result, mocks.MOCK_DF)
+    assert cache.stats()["hits"] == 1
+    dc.insert(mocks.MOCK_DF.head(2), table="test")
+    assert len(dc.query("SELECT * FROM test")) == 2
+
+
+def test_dataconnector_query_cache_params_order():
+    """
+    Tests that named parameters hit the same cache entry in any order
+    Pass Condition: The reordered parameters are served from the cache
+    Fail Condition: The reordered parameters miss the cache
+    """
+    cache = QueryCache()
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE, cache=cache)
+    dc.insert(mocks.MOCK_DF, table="test")
+    sql = "SELECT * FROM test WHERE test1 > :low AND test1 < :high"
+    dc.query(sql, params={"low": 1, "high": 4})
+    result = dc.query(sql, params={"high": 4, "low": 1})
+    assert result["test1"].tolist() == [2, 3]
+    assert cache.stats()["hits"] == 1
+
+
+def test_query_db_cache_params_order():
+    """
+    Tests that query_db serves reordered (and nested) named parameters from the cache
+    Pass Condition: The reordered parameters are served from the cache
+    Fail Condition: The reordered parameters miss the cache
+    """
+    cache = QueryCache()
+    assert QueryCache.make_key("SELECT 1", [{"x": 1, "y": {"a": 1, "b": 2}}]) == (
+        QueryCache.make_key("SELECT 1", [{"y": {"b": 2, "a": 1}, "x": 1}])
+    )
+    with create_engine("sqlite://").connect() as conn:
+        mocks.MOCK_DF.to_sql("test", conn, index=False)
+        sql = "SELECT * FROM test WHERE test1 > :low AND test1 < :high"
+        DataConnectors.query_db(sql, connection=conn, params={"low": 1, "high": 4}, cache=cache)
+        result = DataConnectors.query_db(
+            sql, connection=conn, params={"high": 4, "low": 1}, cache=cache
+        )
+    assert result["test1"].tolist() == [2, 3]
+    assert cache.stats()["hits"] == 1
@@ -1,7 +1,10 @@
 import pytest
 import os
 import pandas as pd
-from DBToolBox.DBConnector import DataConnector, _validate_config
+from sqlalchemy import Float, String, exc, inspect
+from DBToolBox.DBConnector import DataConnector, _validate_config, _partition_bounds
+from DBToolBox.pooling import pool_options
+from DBToolBox.utils import convert_milli_to_timestamps
 from DBToolBox.test import mocks
 from unittest.mock import patch, Mock
 
@@ -222,4 +225,460 @@ def test_dispose_engine(mock_env_bash_url):
     dc = DataConnector(use_env=True)
     # Check the return value of disposing the engine
     result = dc.dispose_engine()
-    assert result == 0
\ No newline at end of file
+    assert result == 0
+
+##----- iter_query tests
+def test_iter_query_01():
+    """
+    Tests that iter_query yields the query results in chunks of the given size
+    Pass Condition: The chunks have the expected sizes and combine to the full result
+    Fail Condition: Error or the chunked results do not match the inserted data
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(mocks.MOCK_DF, table="test")
+    chunks = list(dc.iter_query("SELECT * FROM test", chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    result = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(result, mocks.MOCK_DF)
+
+
+def test_iter_query_02(tmp_path):
+    """
+    Tests that iter_query releases its connection when the generator is closed early
+    Pass Condition: No connections are checked out after closing the generator
+    Fail Condition: The connection is still checked out
+    """
+    dc = DataConnector({"DBC_URL": f"sqlite:///{tmp_path / 'test.db'}"})
+    dc.insert(mocks.MOCK_DF, table="test")
+    chunks = dc.iter_query("SELECT * FROM test", chunksize=1)
+    next(chunks)
+    assert dc.engine.pool.checkedout() == 1
+    chunks.close()
+    assert dc.engine.pool.checkedout() == 0
+
+
+##----- pool_stats tests
+def test_pool_options():
+    """
+    Tests that pool settings in the configuration are converted to create_engine arguments
+    Pass Condition: The expected pool arguments are returned
+    Fail Condition: Error or the pool arguments are incorrect
+    """
+    config = {
+        "DBC_URL": "sqlite://",
+        "DBC_POOL_SIZE": "5",
+        "DBC_POOL_RECYCLE": "3600",
+        "DBC_POOL_PRE_PING": "true",
+        "DBC_POOL_TIMEOUT": "",
+    }
+    result = pool_options(config)
+    assert result == {"pool_size": 5, "pool_recycle": 3600, "pool_pre_ping": True}
+
+
+def test_pool_stats(tmp_path):
+    """
+    Tests that pool_stats reports checked-out/idle connections, overflow events and timeouts
+    Pass Condition: The reported metrics match the connections that were checked out
+    Fail Condition: Error or the metrics are incorrect
+    """
+    config = {
+        "DBC_URL": f"sqlite:///{tmp_path / 'test.db'}",
+        "DBC_POOL_SIZE": "1",
+        "DBC_MAX_OVERFLOW": "1",
+        "DBC_POOL_TIMEOUT": "0.1",
+    }
+    dc = DataConnector(config)
+    first = dc.engine.connect()
+    second = dc.engine.connect()
+    stats = dc.pool_stats()
+    assert stats["checked_out"] == 2
+    assert stats["overflow_events"] == 1
+    with pytest.raises(exc.TimeoutError):
+        dc.engine.connect()
+    first.close()
+    second.close()
+    stats = dc.pool_stats()
+    assert stats["checked_out"] == 0
+    assert stats["idle"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["wait_time_max"] >= 0.1
+
+
+##----- query_partitioned tests
+@pytest.fixture
+def partitioned_dc(tmp_path):
+    dc = DataConnector({"DBC_URL": f"sqlite:///{tmp_path / 'test.db'}"})
+    data = pd.DataFrame({"id": list(range(1, 101)) + [None], "value": range(101)})
+    dc.insert(data, table="test")
+    return dc
+
+
+def test_partition_bounds():
+    """
+    Tests that _partition_bounds splits a range into equal strides
+    Pass Condition: Integer ranges get integer bounds and one partition has no bounds
+    Fail Condition: The bounds are uneven or of the wrong type
+    """
+    assert _partition_bounds(0, 100, 4) == [25, 50, 75]
+    assert _partition_bounds(0.0, 1.0, 2) == [0.5]
+    assert _partition_bounds(1, 10, 1) == []
+
+
+def test_query_partitioned_01(partitioned_dc):
+    """
+    Tests that query_partitioned reads every row (including NULL keys) exactly once
+    Pass Condition: The combined partitions match a single full read
+    Fail Condition: Error or rows are missing/duplicated
+    """
+    result = partitioned_dc.query_partitioned("test", "id", num_partitions=4)
+    expected = partitioned_dc.query("SELECT * FROM test")
+    assert len(result) == 101
+    pd.testing.assert_frame_equal(
+        result.sort_values("value", ignore_index=True),
+        expected.sort_values("value", ignore_index=True),
+    )
+
+
+def test_query_partitioned_timestamp_bounds(file_dc):
+    """
+    Tests that explicit Timestamp bounds and a mixed-case column name are supported
+    Pass Condition: Every row is read once, split across the partitions
+    Fail Condition: The bounds are rejected by the driver or the column is not quoted
+    """
+    data = pd.DataFrame(
+        {"Created At": pd.date_range("2023-01-01", periods=10, freq="D"), "value": range(10)}
+    )
+    file_dc.insert(data, table="test")
+    chunks = list(
+        file_dc.query_partitioned(
+            "test",
+            "Created At",
+            num_partitions=3,
+            lower=pd.Timestamp("2023-01-01"),
+            upper=pd.Timestamp("2023-01-10"),
+            stream=True,
+        )
+    )
+    assert len(chunks) == 3 and all(len(chunk) > 0 for chunk in chunks)
+    assert sorted(pd.concat(chunks)["value"]) == list(range(10))
+
+
+def test_query_partitioned_02(partitioned_dc):
+    """
+    Tests that query_partitioned streams one DataFrame per partition for a query source
+    Pass Condition: One frame is yielded per partition and the rows match the query
+    Fail Condition: Error or the partitions do not cover the query result
+    """
+    chunks = list(
+        partitioned_dc.query_partitioned(
+            "SELECT * FROM test WHERE value < :limit",
+            "id",
+            num_partitions=3,
+            lower=1,
+            upper=50,
+            params={"limit": 50},
+            stream=True,
+        )
+    )
+    assert len(chunks) == 3
+    assert sorted(pd.concat(chunks)["value"]) == list(range(50))
+
+
+##----- insert_parallel tests
+@pytest.fixture
+def file_dc(tmp_path):
+    return DataConnector({"DBC_URL": f"sqlite:///{tmp_path / 'test.db'}"})
+
+
+def _chunks_with_bad_shard():
+    yield pd.DataFrame({"test1": [1, 2], "test2": ["a", "b"]})
+    yield pd.DataFrame({"test1": [3], "test2": ["c"], "missing": [0]})
+    yield pd.DataFrame({"test1": [4], "test2": ["d"]})
+
+
+def test_insert_parallel_01(file_dc):
+    """
+    Tests that insert_parallel splits a DataFrame across workers and loads every shard
+    Pass Condition: Every shard is committed and the table matches the DataFrame
+    Fail Condition: Error, a shard is not committed or the data is incorrect
+    """
+    # SQLite serializes writers, so each shard is committed on its own
+    report = file_dc.insert_parallel(
+        mocks.MOCK_DF, table="test", num_workers=2, atomic=False
+    )
+    assert report["status"].tolist() == ["committed", "committed"]
+    assert report["rows"].sum() == len(mocks.MOCK_DF)
+    result = file_dc.query("SELECT * FROM test ORDER BY test1")
+    pd.testing.assert_frame_equal(result, mocks.MOCK_DF)
+
+
+def test_insert_parallel_02(file_dc):
+    """
+    Tests that an atomic parallel load rolls back every shard when one shard fails
+    Pass Condition: The table is empty and the report shows the failed and rolled back shards
+    Fail Condition: Any shard's rows are committed
+    """
+    report = file_dc.insert_parallel(_chunks_with_bad_shard(), table="test", num_workers=1)
+    assert report["status"].tolist() == ["rolled_back", "failed"]
+    assert report["error"].iloc[1] is not None
+    # Neither the target table nor the staging table is left behind
+    assert inspect(file_dc.engine).get_table_names() == []
+
+
+def test_insert_parallel_replace_rollback(file_dc):
+    """
+    Tests that an atomic load with if_exists="replace" keeps the original table if a shard fails
+    Pass Condition: The original rows survive and the good shards are rolled back
+    Fail Condition: The table is dropped, emptied or partially loaded
+    """
+    file_dc.insert(mocks.MOCK_DF.iloc[:3], table="test")
+    report = file_dc.insert_parallel(
+        _chunks_with_bad_shard(), table="test", num_workers=2, if_exists="replace"
+    )
+    assert "failed" in report["status"].tolist()
+    assert "committed" not in report["status"].tolist()
+    result = file_dc.query("SELECT * FROM test ORDER BY test1")
+    pd.testing.assert_frame_equal(result, mocks.MOCK_DF.iloc[:3])
+
+
+def test_insert_parallel_replace(file_dc):
+    """
+    Tests that a successful atomic load replaces the table from the staged shards
+    Pass Condition: The table holds exactly the new rows
+    Fail Condition: Old rows remain or new rows are missing
+    """
+    file_dc.insert(mocks.MOCK_DF, table="test")
+    data = pd.DataFrame({"test1": range(10), "test2": list("abcdefghij")})
+    report = file_dc.insert_parallel(data, table="test", num_workers=2, if_exists="replace")
+    assert set(report["status"]) == {"committed"}
+    result = file_dc.query("SELECT * FROM test ORDER BY test1")
+    pd.testing.assert_frame_equal(result, data)
+    assert inspect(file_dc.engine).get_table_names() == ["test"]
+
+
+def test_insert_parallel_03(file_dc):
+    """
+    Tests that a non-atomic parallel load reports exactly which shards committed
+    Pass Condition: Only the bad shard fails and the other shards' rows are in the table
+    Fail Condition: The report or the table contents are incorrect
+    """
+    report = file_dc.insert_parallel(
+        _chunks_with_bad_shard(), table="test", num_workers=1, atomic=False
+    )
+    assert report["status"].tolist() == ["committed", "failed", "committed"]
+    result = file_dc.query("SELECT * FROM test ORDER BY test1")
+    assert result["test1"].tolist() == [1, 2, 4]
+
+
+##----- upsert tests
+def test_upsert_01(file_dc):
+    """
+    Tests that upsert updates rows with matching keys and inserts new rows
+    Pass Condition: The table holds the merged data and the affected row count is returned
+    Fail Condition: Error or the table contents are incorrect
+    """
+    with file_dc.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE test (test1 INTEGER PRIMARY KEY, test2 TEXT)")
+    file_dc.insert(mocks.MOCK_DF, table="test", if_exists="append")
+    changes = pd.DataFrame({"test1": [2, 5, 5], "test2": ["x", "e", "y"]})
+    result = file_dc.upsert(changes, table="test", key_columns=["test1"])
+    assert result == 2
+    table = file_dc.query("SELECT * FROM test ORDER BY test1")
+    assert table["test2"].tolist() == ["a", "x", "c", "d", "y"]
+
+
+def test_upsert_02(file_dc):
+    """
+    Tests that upsert with no update columns only inserts new keys
+    Pass Condition: Existing rows are unchanged and new rows are inserted
+    Fail Condition: Error or an existing row is updated
+    """
+    with file_dc.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE test (test1 INTEGER PRIMARY KEY, test2 TEXT)")
+    file_dc.insert(mocks.MOCK_DF, table="test", if_exists="append")
+    changes = pd.DataFrame({"test1": [1, 6], "test2": ["x", None]})
+    file_dc.upsert(changes, table="test", key_columns=["test1"], update_columns=[])
+    table = file_dc.query("SELECT * FROM test ORDER BY test1")
+    assert table["test2"].tolist() == ["a", "b", "c", "d", None]
+
+
+##----- compact query tests
+def test_query_compact():
+    """
+    Tests that query(compact=True) returns compacted dtypes, also for chunked reads
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(pd.DataFrame({"n": [1, 2, 3, 4], "c": ["a", "b", "a", "b"]}), table="test")
+    result = dc.query("SELECT * FROM test", compact=True)
+    assert result.dtypes.astype(str).tolist() == ["int8", "category"]
+    chunks = list(dc.iter_query("SELECT * FROM test", chunksize=2, compact=True))
+    assert [list(chunk["c"].cat.categories) for chunk in chunks] == [["a", "b"], ["a", "b"]]
+
+
+##----- converters tests
+def test_query_converters():
+    """
+    Tests that query and iter_query apply column converters to whole columns
+    Pass Condition: The converted column holds the expected timestamps
+    Fail Condition: Error or the column is not converted
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(pd.DataFrame({"created": [1654119240123, 1654119300999]}), table="events")
+    converters = {"created": lambda col: convert_milli_to_timestamps(col, tz="UTC")}
+    result = dc.query("SELECT * FROM events", converters=converters)
+    expected = pd.to_datetime(["2022-06-01 21:34:00", "2022-06-01 21:35:00"], utc=True)
+    assert result["created"].tolist() == expected.tolist()
+    chunks = list(dc.iter_query("SELECT * FROM events", chunksize=1, converters=converters))
+    assert [chunk["created"].iloc[0] for chunk in chunks] == expected.tolist()
+
+
+##----- execute_batch tests
+def test_execute_batch():
+    """
+    Tests that execute_batch runs a parameterized statement for every row of an iterable
+    Pass Condition: The affected row counts are returned and the rows are written
+    Fail Condition: Error or incorrect counts/rows
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(mocks.MOCK_DF, table="test")
+    rows = ({"test1": i, "test2": str(i)} for i in range(5, 10))
+    assert dc.execute_batch("INSERT INTO test VALUES (:test1, :test2)", rows, page_size=2) == 5
+    updated = dc.execute_batch("UPDATE test SET test2 = ? WHERE test1 > ?", [("x", 7), ("y", 8)])
+    assert updated == 3
+    result = dc.query("SELECT * FROM test")
+    assert len(result) == 9
+    assert result["test2"].tolist()[-3:] == ["7", "x", "y"]
+
+
+def test_export(tmp_path):
+    """
+    Tests that export streams tables and queries into Parquet and CSV files
+    Pass Condition: The files hold every row, in @chunksize row groups
+    Fail Condition: Missing rows or a single row group
+    """
+    import pyarrow.parquet as pq
+
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(mocks.MOCK_DF, table="test")
+    path = tmp_path / "test.parquet"
+    assert dc.export("test", str(path), chunksize=3) == 4
+    assert pq.ParquetFile(path).num_row_groups == 2
+    pd.testing.assert_frame_equal(pd.read_parquet(path), mocks.MOCK_DF)
+    path = tmp_path / "test.csv.bz2"
+    rows = dc.export(
+        "SELECT * FROM test WHERE test1 > ?", str(path), format="csv",
+        compression="bz2", params=(2,),
+    )
+    assert rows == 2
+    pd.testing.assert_frame_equal(pd.read_csv(path), mocks.MOCK_DF.iloc[2:].reset_index(drop=True))
+    with pytest.raises(ValueError):
+        dc.export("test", str(path), format="json")
+
+
+def test_export_empty_result(tmp_path):
+    """
+    Tests that an empty result still produces a valid file
+    Pass Condition: A CSV with only the header and a Parquet file with the columns
+    Fail Condition: No file, or a file without header/schema
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(mocks.MOCK_DF, table="test")
+    csv_path, parquet_path = tmp_path / "empty.csv", tmp_path / "empty.parquet"
+    # Some drivers yield no chunk at all for an empty result
+    with patch.object(DataConnector, "iter_query", return_value=iter([])):
+        assert dc.export("SELECT * FROM test WHERE test1 > 9", str(csv_path), format="csv") == 0
+        assert dc.export("main.test", str(parquet_path)) == 0
+    assert csv_path.read_text() == "test1,test2\n"
+    assert list(pd.read_parquet(parquet_path).columns) == ["test1", "test2"]
+
+
+def test_export_null_first_chunk(tmp_path):
+    """
+    Tests that columns which are entirely NULL in the first chunk are typed
+    from the rest of the result
+    Pass Condition: Every chunk is written with the columns' real types
+    Fail Condition: Error casting a later chunk to a null column
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    df = pd.DataFrame(
+        {
+            "id": range(8),
+            "note": [None] * 5 + ["a", "b", "c"],
+            "qty": [None] * 5 + [1.5, 2.0, 3.0],
+            "empty": [None] * 8,
+        }
+    )
+    dc.insert(df, table="t", dtype={"note": String, "qty": Float, "empty": String})
+    path = tmp_path / "t.parquet"
+    assert dc.export("t", str(path), chunksize=5) == 8
+    result = pd.read_parquet(path)
+    assert result["note"].tolist() == [None] * 5 + ["a", "b", "c"]
+    assert result["qty"].iloc[5:].tolist() == [1.5, 2.0, 3.0]
+    assert result["empty"].isna().all()
+
+
+def test_load_file(tmp_path):
+    """
+    Tests that load_file creates tables from a sample and loads CSV/Parquet files
+    Pass Condition: Every row is loaded and the table is created or appended to
+    Fail Condition: Missing rows or wrong if_exists handling
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    csv_path = tmp_path / "test.csv.gz"
+    mocks.MOCK_DF.to_csv(csv_path, index=False)
+    parquet_path = tmp_path / "test.parquet"
+    mocks.MOCK_DF.to_parquet(parquet_path, row_group_size=3)
+    assert dc.load_file(str(csv_path), "test", sample_rows=2, chunksize=3) == 4
+    pd.testing.assert_frame_equal(dc.query("SELECT * FROM test"), mocks.MOCK_DF)
+    assert dc.load_file(str(parquet_path), "test", chunksize=3) == 4
+    assert len(dc.query("SELECT * FROM test")) == 8
+    assert dc.load_file(str(parquet_path), "test", if_exists="replace") == 4
+    assert len(dc.query("SELECT * FROM test")) == 4
+    with pytest.raises(ValueError):
+        dc.load_file(str(parquet_path), "test", if_exists="fail")
+    with pytest.raises(ValueError):
+        dc.load_file(str(parquet_path), "missing", infer_schema=False)
+
+
+def test_load_file_empty(tmp_path):
+    """
+    Tests that an empty file cannot be used to infer a table's columns
+    Pass Condition: ValueError("file has no rows") and the existing table is untouched
+    Fail Condition: StopIteration escapes or the table is replaced
+    """
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(mocks.MOCK_DF, table="test")
+    path = tmp_path / "empty.parquet"
+    mocks.MOCK_DF.head(0).to_parquet(path)
+
+    def load():
+        yield dc.load_file(str(path), "test", if_exists="replace")
+
+    with pytest.raises(ValueError, match="file has no rows"):
+        next(load())
+    assert len(dc.query("SELECT * FROM test")) == 4
+
+
+def test_upsert_copy_payload(file_dc):
+    """
+    Tests that the COPY staging load keeps empty strings and nullable integers intact
+    Pass Condition: '' stays an empty string, NaN becomes NULL and float keys/values
+                    load into INTEGER columns
+    Fail Condition: Empty strings become NULL or the integer columns are rejected
+    """
+    with file_dc.engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE test (id INTEGER PRIMARY KEY, qty INTEGER, note TEXT)"
+        )
+        conn.exec_driver_sql("INSERT INTO test VALUES (1, 5, 'x')")
+    changes = pd.DataFrame({"id": [1.0, 2.0], "qty": [None, 3], "note": ["", None]})
+    assert changes["qty"].dtype == "float64"
+    with patch("DBToolBox.DBConnector.supports_copy", return_value=True), patch(
+        "DBToolBox.DBConnector.copy_rows", side_effect=mocks.sqlite_copy_rows
+    ) as copy_rows:
+        assert file_dc.upsert(changes, table="test", key_columns=["id"]) == 2
+    assert copy_rows.called
+    with file_dc.engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT id, qty, note FROM test ORDER BY id").all()
+    assert [tuple(row) for row in rows] == [(1, None, ""), (2, 3, None)]
@@ -0,0 +1,96 @@
+import datetime
+import pytest
+import pandas as pd
+from DBToolBox.DBConnector import DataConnector
+from DBToolBox.incremental import JSONStateStore, SQLiteStateStore
+
+
+@pytest.fixture
+def events_dc(tmp_path):
+    dc = DataConnector({"DBC_URL": f"sqlite:///{tmp_path / 'test.db'}"})
+    events = pd.DataFrame({"event_id": [1, 2, 2, 3, 4, None], "value": list("abcdef")})
+    dc.insert(events, table="events")
+    return dc
+
+
+@pytest.mark.parametrize("store_class", [JSONStateStore, SQLiteStateStore])
+def test_state_store_round_trip(tmp_path, store_class):
+    """
+    Tests that the state stores persist watermarks with their types and precision
+    Pass Condition: Datetimes, integers and nanosecond Timestamps are read back unchanged
+    Fail Condition: A watermark is lost, retyped or truncated
+    """
+    store = store_class(str(tmp_path / "state"))
+    assert store.get("key") is None
+    store.set("key", datetime.datetime(2022, 6, 1, 21, 34))
+    store.set("other", 42)
+    assert store.get("key") == datetime.datetime(2022, 6, 1, 21, 34)
+    assert store_class(str(tmp_path / "state")).get("other") == 42
+    store.set("nanos", pd.Timestamp("2022-06-01 21:34:00.000000123"))
+    assert store_class(str(tmp_path / "state")).get("nanos").value == (
+        pd.Timestamp("2022-06-01 21:34:00.000000123").value
+    )
+
+
+def test_incremental_01(events_dc, tmp_path):
+    """
+    Tests that the incremental reader never splits rows sharing a watermark
+    and only reads rows beyond the committed watermark on the next run
+    Pass Condition: Chunks hold whole watermark values and a new run only sees new rows
+    Fail Condition: Rows are split, skipped or read twice
+    """
+    store = JSONStateStore(str(tmp_path / "state.json"))
+    reader = events_dc.incremental("events", "event_id", state_store=store, chunksize=2)
+    chunks = []
+    for chunk in reader:
+        chunks.append(chunk["value"].tolist())
+        reader.commit()
+    assert chunks == [["a"], ["b", "c"], ["d"], ["e"]]
+    assert reader.watermark == 4
+    events_dc.insert(
+        pd.DataFrame({"event_id": [5], "value": ["g"]}), table="events", if_exists="append"
+    )
+    result = list(events_dc.incremental("events", "event_id", state_store=store))
+    assert [chunk["value"].tolist() for chunk in result] == [["g"]]
+
+
+def test_incremental_02(events_dc, tmp_path):
+    """
+    Tests that the watermark does not advance for batches that were not committed
+    Pass Condition: An uncommitted batch is read again by the next run
+    Fail Condition: The watermark advances without a commit
+    """
+    store = JSONStateStore(str(tmp_path / "state.json"))
+    reader = events_dc.incremental("events", "event_id", state_store=store, chunksize=2)
+    chunks = iter(reader)
+    next(chunks)
+    reader.commit()
+    next(chunks)
+    assert reader.watermark == 1
+    rerun = events_dc.incremental("events", "event_id", state_store=store)
+    assert pd.concat(list(rerun))["value"].tolist() == ["b", "c", "d", "e"]
+
+
+def test_incremental_nanosecond_watermark(tmp_path):
+    """
+    Tests that a nanosecond watermark on a quoted table and column only
+    selects the rows after it
+    Pass Condition: Rows at or before the watermark are skipped and later rows are read
+    Fail Condition: Error or the row within the same microsecond is read again
+    """
+    dc = DataConnector({"DBC_URL": f"sqlite:///{tmp_path / 'test.db'}"})
+    events = pd.DataFrame(
+        {
+            "Created At": pd.to_datetime(
+                ["2022-06-01 21:34:00", "2022-06-01 21:34:00.000001", "2022-06-01 21:34:01"],
+                format="ISO8601",
+            ),
+            "value": list("abc"),
+        }
+    )
+    dc.insert(events, table="Event Log")
+    store = JSONStateStore(str(tmp_path / "state.json"))
+    reader = dc.incremental("Event Log", "Created At", state_store=store)
+    store.set(reader.key, pd.Timestamp("2022-06-01 21:34:00.000001500"))
+    result = pd.concat(list(dc.incremental("Event Log", "Created At", state_store=store)))
+    assert result["value"].tolist() == ["c"]
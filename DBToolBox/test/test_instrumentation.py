@@ -0,0 +1,73 @@
+import pytest
+import pandas as pd
+from DBToolBox.DBConnector import DataConnector
+from DBToolBox.test import mocks
+
+
+@pytest.fixture
+def instrumented():
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    records = []
+    instr = dc.instrument(hooks=[records.append])
+    return dc, instr, records
+
+
+def test_query_and_insert_records(instrumented):
+    """
+    Tests that query and insert produce phase timings, rows and bytes
+    Pass Condition: One record per operation with every applicable phase filled in
+    Fail Condition: Missing records or phase timings
+    """
+    dc, instr, records = instrumented
+    dc.insert(mocks.MOCK_DF, table="test")
+    dc.query("SELECT * FROM test")
+    insert, query = records
+    assert insert["operation"] == "insert" and insert["rows"] == 4
+    assert insert["to_sql_s"] >= 0 and insert["fetch_s"] is None
+    assert query["operation"] == "query" and query["rows"] == 4
+    assert query["bytes"] > 0 and query["statements"] >= 1
+    for phase in ("pool_wait_s", "connect_s", "execute_s", "fetch_s"):
+        assert 0 <= query[phase] <= query["total_s"]
+    summary = instr.summary()
+    assert summary.loc["query", "count"] == 1
+    assert summary.loc["insert", "rows"] == 4
+
+
+def test_statement_records(instrumented):
+    """
+    Tests that statements run outside query/insert are recorded on their own
+    """
+    dc, instr, records = instrumented
+    with dc.engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+    assert records[-1]["operation"] == "statement"
+    assert records[-1]["statement"] == "SELECT 1"
+
+
+def test_failed_query_record(instrumented):
+    """
+    Tests that failing queries are recorded with their error
+    """
+    dc, instr, records = instrumented
+    with pytest.raises(Exception):
+        dc.query("SELECT * FROM missing_table")
+    assert "missing_table" in records[-1]["error"]
+    assert instr.summary().loc["query", "errors"] == 1
+
+
+def test_slow_query_log(instrumented, caplog):
+    """
+    Tests that queries over the threshold are logged with their query plan
+    Pass Condition: The slow query is logged and kept with its plan
+    Fail Condition: The query is not logged or the plan is missing
+    """
+    dc, instr, records = instrumented
+    dc.insert(mocks.MOCK_DF, table="test")
+    dc.instrument(slow_query_threshold=0.0, explain=True)
+    with caplog.at_level("WARNING", logger="DBToolBox.instrumentation"):
+        dc.query("SELECT * FROM test WHERE test1 > 1")
+    slow = dc.instrumentation.slow_queries[-1]
+    assert "SCAN" in slow["explain"]
+    assert "Slow query" in caplog.text
+    # The EXPLAIN statement itself is not recorded
+    assert [r["operation"] for r in dc.instrumentation.records] == ["query"]
@@ -0,0 +1,128 @@
+import pytest
+import weakref
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from DBToolBox import EDA
+from DBToolBox.DBConnector import DataConnector
+from DBToolBox.memory import MemoryBudget, MemoryBudgetExceeded, coalesce_chunks
+from DBToolBox.test import mocks
+
+
+def make_text_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    words = np.array(["x" * length for length in range(1, 60)], dtype=object)
+    return pd.DataFrame({"text": rng.choice(words, rows), "number": np.arange(rows)})
+
+
+def budget_mb(df: pd.DataFrame, fraction: float) -> float:
+    return EDA.get_size_mb(df, exact=True) * fraction
+
+
+##----- memory_report tests
+def test_memory_report_exact():
+    """
+    Tests that the exact memory report matches pandas' deep memory usage
+    Pass Condition: The bytes of every column match memory_usage(deep=True)
+    Fail Condition: Any column size differs
+    """
+    df = make_text_frame(500)
+    report = EDA.memory_report(df, exact=True)
+    assert report["bytes"].tolist() == df.memory_usage(deep=True).tolist()
+    assert not report["estimated"].any()
+    assert EDA.get_size_mb(df, exact=True) == round(df.memory_usage(deep=True).sum() / 10**6, 4)
+
+
+def test_memory_report_sampled():
+    """
+    Tests that large object columns are estimated from a sample
+    Pass Condition: The estimate is within 2% of the exact deep size
+    Fail Condition: The column is not estimated or the estimate is off
+    """
+    df = make_text_frame(50000)
+    report = EDA.memory_report(df, sample_size=2000).set_index("column_name")
+    exact = df["text"].memory_usage(index=False, deep=True)
+    assert report.loc["text", "estimated"]
+    assert abs(report.loc["text", "bytes"] - exact) / exact < 0.02
+    assert report.loc["number", "bytes"] == df["number"].nbytes
+
+
+##----- MemoryBudget tests
+def test_memory_budget_reserve():
+    """
+    Tests that reservations are tracked and that oversized ones are rejected
+    """
+    budget = MemoryBudget(max_mb=0.001)
+    with budget.hold(600):
+        assert budget.remaining == 400
+        with pytest.raises(MemoryBudgetExceeded):
+            budget.reserve(500)
+    assert budget.used == 0
+    assert budget.peak == 600
+
+
+def test_coalesce_chunks():
+    """
+    Tests that chunks are combined into frames that fit the budget
+    Pass Condition: Every frame fits the budget and the rows are unchanged
+    Fail Condition: A frame exceeds the budget or rows are lost
+    """
+    df = make_text_frame(1000)
+    budget = MemoryBudget(max_mb=budget_mb(df, 0.3))
+    chunks = (df.iloc[start : start + 50] for start in range(0, 1000, 50))
+    frames = []
+    for frame in coalesce_chunks(chunks, budget):
+        assert 50 < len(frame) and budget.used <= budget.limit
+        frames.append(frame)
+    assert 1 < len(frames) < 20
+    assert budget.used == 0
+    pd.testing.assert_frame_equal(pd.concat(frames, ignore_index=True), df)
+
+
+def test_coalesce_chunks_releases_sources():
+    """
+    Tests that the source chunks of a combined frame are released before it is yielded
+    Pass Condition: Only the chunk read ahead of each frame is still alive
+    Fail Condition: The source chunks stay alive while the frame is used
+    """
+    df = make_text_frame(1000)
+    budget = MemoryBudget(max_mb=budget_mb(df, 0.3))
+    refs = []
+
+    def chunks():
+        for start in range(0, 1000, 50):
+            chunk = df.iloc[start : start + 50].copy()
+            refs.append(weakref.ref(chunk))
+            yield chunk
+
+    for frame in coalesce_chunks(chunks(), budget):
+        assert sum(ref() is not None for ref in refs) <= 1
+
+
+##----- DataConnector integration tests
+def test_iter_query_memory_budget():
+    """
+    Tests that iter_query combines fetched chunks to fill the memory budget
+    """
+    df = make_text_frame(1000)
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    dc.insert(df, table="test")
+    budget = MemoryBudget(max_mb=budget_mb(df, 0.5))
+    chunks = list(dc.iter_query("SELECT * FROM test", chunksize=100, memory_budget=budget))
+    assert 1 < len(chunks) < 10
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
+    with pytest.raises(MemoryBudgetExceeded):
+        list(dc.iter_query("SELECT * FROM test", chunksize=1000, memory_budget=budget))
+
+
+def test_insert_memory_budget():
+    """
+    Tests that insert picks a chunk size that fits the memory budget
+    """
+    df = make_text_frame(1000)
+    dc = DataConnector(mocks.CONFIG_INMEMORY_ENGINE)
+    budget = MemoryBudget(max_mb=budget_mb(df, 0.5))
+    with patch.object(pd.DataFrame, "to_sql", autospec=True) as to_sql:
+        dc.insert(df, table="test", memory_budget=budget)
+    assert to_sql.call_args.kwargs["chunksize"] == budget.rows_per_chunk(df, fraction=0.5)
+    assert 0 < to_sql.call_args.kwargs["chunksize"] < 1000
@@ -0,0 +1,115 @@
+import random
+import numpy as np
+import pandas as pd
+from DBToolBox import EDA
+from DBToolBox.profiling import HyperLogLog, MisraGries, StreamingProfiler, profile_chunks
+
+
+def make_frame(rows: int = 20) -> pd.DataFrame:
+    random.seed(1)
+    return pd.DataFrame(
+        {
+            "testcol1": random.choices([1, 2, 3, 4], k=rows),
+            "testcol2": random.choices(
+                ["Test1", "Test2", "Test3", "Test4", "Test5", None], k=rows
+            ),
+            "testcol3": [i for i in range(1, rows + 1)],
+        }
+    )
+
+
+def chunks(df: pd.DataFrame, size: int):
+    for start in range(0, len(df), size):
+        yield df.iloc[start : start + size]
+
+
+##----- StreamingProfiler tests
+def test_profile_chunks_matches_get_column_info():
+    """
+    Tests that profiling a frame in chunks gives the same summary as get_column_info
+    Pass Condition: The shared columns are equal and min/max/top values are correct
+    Fail Condition: Any shared column differs
+    """
+    df = make_frame()
+    result = profile_chunks(chunks(df, 6))
+    expected = EDA.get_column_info(df)
+    pd.testing.assert_frame_equal(result[expected.columns], expected)
+    assert result["cardinality_exact"].all()
+    assert result.loc[2, "min"] == 1 and result.loc[2, "max"] == 20
+    assert result.loc[0, "top_values"][0] == tuple(df["testcol1"].value_counts().iloc[:1].items())[0]
+
+
+def test_profiler_integer_and_float_chunks():
+    """
+    Tests that a column read as int64 in one chunk and float64 (with nulls) in
+    another is counted consistently
+    """
+    first = pd.DataFrame({"a": [1, 2, 3]})
+    second = pd.DataFrame({"a": [3.0, None, 4.0, -0.0, 0.0]})
+    result = profile_chunks([first, second])
+    assert result.loc[0, "cardinality"] == 5
+    assert result.loc[0, "nulls"] == 1
+    assert result.loc[0, "dtype"] == np.float64
+
+
+def test_profiler_merge():
+    """
+    Tests that partial profiles from separate workers merge into the full profile
+    Pass Condition: The merged profile equals the profile of the whole frame
+    Fail Condition: Any field differs
+    """
+    df = make_frame(200)
+    left = StreamingProfiler().update(df.iloc[:120])
+    right = StreamingProfiler().update(df.iloc[120:])
+    merged = left.merge(right).result()
+    expected = profile_chunks([df])
+    # Misra-Gries counts of non-frequent values depend on the merge order
+    pd.testing.assert_frame_equal(
+        merged.drop(columns="top_values"), expected.drop(columns="top_values")
+    )
+    assert merged.loc[:1, "top_values"].tolist() == expected.loc[:1, "top_values"].tolist()
+
+
+def test_profiler_approximate_cardinality():
+    """
+    Tests that cardinalities above the exact limit are estimated within the
+    documented error bound
+    """
+    df = pd.DataFrame({"id": np.arange(200000) % 50000})
+    result = profile_chunks(chunks(df, 30000), exact_limit=100)
+    assert not result.loc[0, "cardinality_exact"]
+    # 3 standard errors of 1.04 / sqrt(2**14)
+    assert abs(result.loc[0, "cardinality"] - 50000) / 50000 < 3 * 1.04 / 2**7
+
+
+##----- Sketch tests
+def test_hyperloglog_merge():
+    """
+    Tests that merging two sketches estimates the cardinality of their union
+    Pass Condition: The merged registers equal those of a sketch of all the values
+    Fail Condition: The merged estimate differs from the combined sketch
+    """
+    first, second, both = HyperLogLog(12), HyperLogLog(12), HyperLogLog(12)
+    hashes = pd.util.hash_array(np.arange(20000))
+    first.add_hashes(hashes[:12000])
+    second.add_hashes(hashes[8000:])
+    both.add_hashes(hashes)
+    first.merge(second)
+    np.testing.assert_array_equal(first.registers, both.registers)
+    assert abs(both.estimate() - 20000) / 20000 < 3 * 1.04 / 2**6
+
+
+def test_misra_gries_error_bound():
+    """
+    Tests that Misra-Gries under-estimates counts by at most n / (capacity + 1)
+    and always reports the heavy hitters
+    """
+    values = pd.Series(["a"] * 500 + ["b"] * 300 + [str(i) for i in range(1000)])
+    summary = MisraGries(capacity=10)
+    for chunk in chunks(values.to_frame("v"), 250):
+        summary.add_counts(chunk["v"].value_counts().to_dict())
+    bound = len(values) / 11
+    top = dict(summary.top(2))
+    assert set(top) == {"a", "b"}
+    assert 500 - bound <= top["a"] <= 500
+    assert 300 - bound <= top["b"] <= 300
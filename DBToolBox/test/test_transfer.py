@@ -0,0 +1,135 @@
+import gzip
+import pytest
+import pandas as pd
+from DBToolBox.transfer import (
+    copy_from_csv,
+    copy_to_csv,
+    file_format,
+    iter_file_chunks,
+    source_query,
+    write_csv,
+    write_parquet,
+)
+from DBToolBox.test import mocks
+
+
+class CopyCursor:
+    """A psycopg2-like cursor that answers COPY ... TO STDOUT with CSV bytes"""
+
+    def __init__(self, data):
+        self.data = data
+        self.rowcount = -1
+
+    def copy_expert(self, sql, file):
+        self.sql = sql
+        # psycopg2 writes the output in several blocks
+        for line in self.data.to_csv(index=False).encode().splitlines(keepends=True):
+            file.write(line)
+        self.rowcount = len(self.data)
+
+
+class CopyFromCursor:
+    """A psycopg2-like cursor that reads COPY ... FROM STDIN input in blocks"""
+
+    def copy_expert(self, sql, file, size=8192):
+        self.sql = sql
+        self.blocks = list(iter(lambda: file.read(size), b""))
+        self.rowcount = b"".join(self.blocks).count(b"\n") - 1
+
+
+def test_source_query():
+    """
+    Tests that single names are read as quoted tables and queries are kept
+    Pass Condition: Plain and dotted names are quoted per part, quoted names are kept
+    Fail Condition: A dotted name is quoted as a single identifier
+    """
+    assert source_query("sales") == 'SELECT * FROM "sales"'
+    assert source_query("sales", schema="dw") == 'SELECT * FROM "dw"."sales"'
+    assert source_query("SELECT a FROM t;") == "SELECT a FROM t"
+    assert source_query("public.sales") == 'SELECT * FROM "public"."sales"'
+    assert source_query('"odd.name"') == 'SELECT * FROM "odd.name"'
+    with pytest.raises(ValueError):
+        source_query("public.sales", schema="dw")
+
+
+def test_copy_to_csv(tmp_path):
+    """
+    Tests that COPY output is streamed into a (compressed) CSV file
+    Pass Condition: The file round-trips to the source data
+    Fail Condition: Missing header, rows or compression
+    """
+    cursor = CopyCursor(mocks.MOCK_DF)
+    path = tmp_path / "test.csv.gz"
+    assert copy_to_csv(cursor, "SELECT * FROM test", str(path), compression="gzip") == 4
+    assert cursor.sql == "COPY (SELECT * FROM test) TO STDOUT WITH (FORMAT csv, HEADER)"
+    with gzip.open(path) as f:
+        pd.testing.assert_frame_equal(pd.read_csv(f), mocks.MOCK_DF)
+    with pytest.raises(ValueError):
+        copy_to_csv(cursor, "SELECT 1", str(path), compression="zip")
+
+
+def test_write_csv_chunks(tmp_path):
+    """
+    Tests that chunks are appended with a single header row
+    """
+    path = tmp_path / "test.csv"
+    chunks = [mocks.MOCK_DF.iloc[:3], mocks.MOCK_DF.iloc[3:]]
+    assert write_csv(chunks, str(path)) == 4
+    pd.testing.assert_frame_equal(pd.read_csv(path), mocks.MOCK_DF)
+
+
+def test_write_parquet_row_groups(tmp_path):
+    """
+    Tests that every chunk becomes a row group cast to the first chunk's schema
+    Pass Condition: Two row groups with consistent types
+    Fail Condition: A single row group or mismatched types
+    """
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "test.parquet"
+    chunks = [mocks.MOCK_DF.iloc[:3], mocks.MOCK_DF.iloc[3:].astype({"test1": "int32"})]
+    assert write_parquet(chunks, str(path), compression="gzip") == 4
+    parquet = pq.ParquetFile(path)
+    assert parquet.num_row_groups == 2
+    assert parquet.metadata.row_group(0).column(0).compression == "GZIP"
+    pd.testing.assert_frame_equal(pd.read_parquet(path), mocks.MOCK_DF)
+
+
+def test_file_format():
+    """
+    Tests that the format and compression are inferred from the extensions
+    """
+    assert file_format("sales.csv") == ("csv", None)
+    assert file_format("sales.CSV.gz") == ("csv", "gzip")
+    assert file_format("sales.pq") == ("parquet", None)
+    assert file_format("sales.data", format="arrow", compression=None) == ("arrow", None)
+    with pytest.raises(ValueError):
+        file_format("sales.data")
+
+
+def test_copy_from_csv(tmp_path):
+    """
+    Tests that a compressed CSV file is streamed into COPY with its header columns
+    Pass Condition: The decompressed file is passed through unchanged
+    Fail Condition: Wrong COPY statement or file contents
+    """
+    path = tmp_path / "test.csv.gz"
+    mocks.MOCK_DF.to_csv(path, sep=";", index=False)
+    cursor = CopyFromCursor()
+    assert copy_from_csv(cursor, str(path), "test", schema="dw", compression="gzip", delimiter=";") == 4
+    assert cursor.sql == (
+        'COPY "dw"."test" ("test1", "test2") FROM STDIN '
+        "WITH (FORMAT csv, HEADER, DELIMITER ';')"
+    )
+    assert b"".join(cursor.blocks) == mocks.MOCK_DF.to_csv(sep=";", index=False).encode()
+
+
+def test_iter_file_chunks_arrow(tmp_path):
+    """
+    Tests that Arrow IPC files are read in chunks of at most @chunksize rows
+    """
+    path = tmp_path / "test.arrow"
+    mocks.MOCK_DF.to_feather(path)
+    chunks = list(iter_file_chunks(str(path), "arrow", chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), mocks.MOCK_DF)
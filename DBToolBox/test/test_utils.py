@@ -0,0 +1,73 @@
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+from DBToolBox import utils
+
+
+##----- convert_milli_to_timestamps tests
+def test_convert_milli_to_timestamps():
+    """
+    Tests that the vectorized converter matches the scalar one, element by element
+    Pass Condition: The same naive, second-floored timestamps are returned
+    Fail Condition: Any timestamp differs
+    """
+    millis = np.array([1654119240123, 1654119240999, 0, -1500, 1667716200000])
+    result = utils.convert_milli_to_timestamps(millis)
+    expected = [utils.convert_milli_to_timestamp(int(value)) for value in millis]
+    assert isinstance(result, pd.DatetimeIndex)
+    assert result.tolist() == expected
+
+
+def test_convert_milli_to_timestamps_series_tz():
+    """
+    Tests that Series input keeps its index and that timezones are applied
+    """
+    millis = pd.Series([1654119240123, None], index=[5, 6], name="created")
+    result = utils.convert_milli_to_timestamps(millis, tz="America/New_York")
+    assert result.index.tolist() == [5, 6] and result.name == "created"
+    assert result.iloc[0] == pd.Timestamp("2022-06-01 17:34:00", tz="America/New_York")
+    assert pd.isna(result.iloc[1])
+
+
+##----- convert_gmt_strings_to_timestamps tests
+def test_convert_gmt_strings_to_timestamps():
+    """
+    Tests that the vectorized converter drops fractional seconds like the scalar one
+    """
+    strings = ["2022-06-01T21:34:00.0", "2022-06-01T21:34:59.999", "2022-06-01T21:35:00"]
+    result = utils.convert_gmt_strings_to_timestamps(strings)
+    assert result.tolist() == [utils.convert_gmt_string_to_timestamp(s) for s in strings]
+    aware = utils.convert_gmt_strings_to_timestamps(pd.Series(strings + [None]), tz="UTC")
+    assert aware.iloc[1] == pd.Timestamp("2022-06-01 21:34:59", tz="UTC")
+    assert pd.isna(aware.iloc[3])
+
+
+def test_convert_gmt_strings_to_timestamps_offsets():
+    """
+    Tests that strings with a UTC offset keep their wall time when tz is None
+    Pass Condition: Offsets are dropped without shifting the time, and applied (even after
+                    fractional seconds) with a tz
+    Fail Condition: The naive result is shifted to UTC, or an offset is lost
+    """
+    strings = ["2022-06-01T21:34:00+02:00", "2022-06-01T21:34:00.5+02:00", "2022-06-01T21:34:00Z"]
+    result = utils.convert_gmt_strings_to_timestamps(strings)
+    assert result.tolist() == [pd.Timestamp("2022-06-01 21:34:00")] * 3
+    aware = utils.convert_gmt_strings_to_timestamps(strings[:2], tz="UTC")
+    assert aware.tolist() == [pd.Timestamp("2022-06-01 19:34:00", tz="UTC")] * 2
+
+
+def test_utils_import_is_lazy():
+    """
+    Tests that importing utils does not load numpy or pandas
+    Pass Condition: Neither module is loaded by the import
+    Fail Condition: numpy/pandas are imported eagerly
+    """
+    probe = (
+        "import sys; import DBToolBox.utils; "
+        "print([m for m in ('numpy', 'pandas') if m in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    assert output == ["[]"]
@@ -0,0 +1,202 @@
+"""Helpers for streaming query results to files and files into tables"""
+import bz2
+import csv
+import gzip
+import lzma
+import os
+from DBToolBox.bulk import qualified_name, quote_identifier
+
+EXPORT_FORMATS = ("parquet", "csv")
+# File openers for the compressions supported by CSV files
+CSV_COMPRESSIONS = {None: open, "gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+# File extensions used to infer the format and compression of loaded files
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+
+def source_query(query_or_table: str, schema: str = None) -> str:
+    """
+    Returns @query_or_table as a SELECT statement: a single name is read
+    as a table ("sales" or "public.sales"), which is quoted unless it
+    already holds double quotes
+    """
+    source = query_or_table.strip().rstrip(";")
+    if len(source.split()) > 1:
+        return source
+    if '"' in source:
+        # Already quoted by the caller
+        return f"SELECT * FROM {source}"
+    if "." in source:
+        if schema is not None:
+            raise ValueError(f"{source} is schema-qualified: please do not also pass schema")
+        schema, source = source.split(".", 1)
+    return f"SELECT * FROM {qualified_name(source, schema)}"
+
+
+def open_csv(path: str, compression: str = None, mode: str = "wt"):
+    """Opens @path in @mode ("wt", "wb", "rt" or "rb") with the given CSV @compression"""
+    if compression not in CSV_COMPRESSIONS:
+        raise ValueError(
+            f"Unsupported CSV compression: {compression} "
+            f"(use one of {', '.join(str(c) for c in CSV_COMPRESSIONS)})"
+        )
+    if mode.endswith("b"):
+        return CSV_COMPRESSIONS[compression](path, mode)
+    return CSV_COMPRESSIONS[compression](path, mode, newline="", encoding="utf-8")
+
+
+def copy_to_csv(cursor, query: str, path: str, compression: str = None) -> int:
+    """
+    Streams the result of @query into a CSV file (with a header row)
+    through `COPY (...) TO STDOUT` using the given psycopg2 cursor.
+    Rows go straight from the server to the file without being parsed.
+    Returns the number of rows written.
+    """
+    sql = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)"
+    with open_csv(path, compression, mode="wb") as f:
+        cursor.copy_expert(sql=sql, file=f)
+    return cursor.rowcount
+
+
+def write_csv(chunks, path: str, compression: str = None) -> int:
+    """
+    Appends an iterable of DataFrames to a CSV file (with a header row),
+    one chunk at a time. Returns the number of rows written.
+    """
+    rows = 0
+    with open_csv(path, compression) as f:
+        for number, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=number == 0, index=False)
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, path: str, compression: str = None, column_sample=None) -> int:
+    """
+    Writes an iterable of DataFrames to a Parquet file, one row group per
+    chunk, so only one chunk is held in memory. The file's schema is taken
+    from the first chunk and later chunks are cast to it.
+    @compression is any Parquet codec supported by pyarrow (default snappy).
+    @column_sample: A function returning a frame with a non-null value of
+                    the given column (or no rows). It types the columns
+                    that are entirely null in the first chunk, which would
+                    otherwise be typed null for the whole file.
+    Returns the number of rows written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("Parquet exports require pyarrow. Please install it and try again")
+        raise
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                if column_sample is not None:
+                    for number, field in enumerate(schema):
+                        if pa.types.is_null(field.type):
+                            sample = pa.Table.from_pandas(
+                                column_sample(field.name), preserve_index=False
+                            )
+                            schema = schema.set(number, field.with_type(sample.schema[0].type))
+                    table = table.cast(schema)
+                writer = pq.ParquetWriter(path, schema, compression=compression or "snappy")
+            elif not table.schema.equals(writer.schema):
+                try:
+                    table = table.cast(writer.schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    print(
+                        f"A chunk does not match the column types of the file: {writer.schema}"
+                    )
+                    raise
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def file_format(path: str, format: str = None, compression: str = "infer"):
+    """
+    Returns the (format, compression) of a file to load, inferring them
+    from its extensions (e.g. "sales.csv.gz" is a gzip-compressed CSV)
+    """
+    root, extension = os.path.splitext(path.lower())
+    if compression == "infer":
+        compression = COMPRESSION_EXTENSIONS.get(extension)
+        if compression is not None:
+            extension = os.path.splitext(root)[1]
+    if format is None:
+        format = FILE_FORMATS.get(extension)
+        if format is None:
+            raise ValueError(f"Cannot infer the file format of {path}: please pass format")
+    if format not in set(FILE_FORMATS.values()):
+        raise ValueError(f"format must be one of {', '.join(sorted(set(FILE_FORMATS.values())))}")
+    return format, compression
+
+
+def csv_header(path: str, compression: str = None, delimiter: str = ",") -> list:
+    """Returns the column names in the header row of a CSV file"""
+    with open_csv(path, compression, mode="rt") as f:
+        return next(csv.reader(f, delimiter=delimiter))
+
+
+def copy_from_csv(
+    cursor, path: str, table: str, schema: str = None, compression: str = None, delimiter: str = ","
+) -> int:
+    """
+    Streams a CSV file (with a header row) into @table through
+    `COPY ... FROM STDIN` using the given psycopg2 cursor. The file is
+    read (and decompressed) in blocks, so memory use does not depend on
+    its size. Returns the number of rows loaded.
+    """
+    columns = ", ".join(quote_identifier(col) for col in csv_header(path, compression, delimiter))
+    options = "FORMAT csv, HEADER"
+    if delimiter != ",":
+        options += ", DELIMITER '" + delimiter.replace("'", "''") + "'"
+    sql = f"COPY {qualified_name(table, schema)} ({columns}) FROM STDIN WITH ({options})"
+    with open_csv(path, compression, mode="rb") as f:
+        cursor.copy_expert(sql=sql, file=f)
+    return cursor.rowcount
+
+
+def iter_file_chunks(
+    path: str, format: str, chunksize: int = 100000, compression: str = None, delimiter: str = ","
+):
+    """
+    Lazily yields the rows of a CSV, Parquet or Arrow IPC file as
+    DataFrames of (at most) @chunksize rows. Parquet files are read as
+    record batches and Arrow files are memory-mapped.
+    """
+    import pandas as pd
+
+    if format == "csv":
+        yield from pd.read_csv(path, sep=delimiter, chunksize=chunksize, compression=compression)
+        return
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print(f"Loading {format} files requires pyarrow. Please install it and try again")
+        raise
+    if format == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+        return
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for number in range(reader.num_record_batches):
+            batch = reader.get_batch(number)
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
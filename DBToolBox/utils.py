@@ -1,5 +1,15 @@
 """A collection of utility functions to work with data"""
+# numpy and pandas are imported by the vectorized converters, so the scalar
+# helpers stay cheap to import
+import time
 from datetime import datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# A trailing UTC offset ("Z", "+02:00", "-0500") after the time of day
+_UTC_OFFSET = r"(\d{2}:\d{2}(?::\d{2})?)(?:Z|[+-]\d{2}(?::?\d{2})?)$"
 
 
 def convert_milli_to_timestamp(time_milli: int) -> datetime:
@@ -15,3 +25,90 @@ def convert_gmt_string_to_timestamp(time_str: str) -> datetime:
     '2022-06-01T21:34:00.0'
     """
     return datetime.fromisoformat(time_str.split(".")[0])
+
+
+def _as_datetimes(values, original):
+    """Returns the converted values as a Series if the original input was one"""
+    import pandas as pd
+
+    if isinstance(original, pd.Series):
+        return pd.Series(values, index=original.index, name=original.name)
+    return pd.DatetimeIndex(values, name=getattr(original, "name", None))
+
+
+def _local_offsets(seconds: "np.ndarray") -> "np.ndarray":
+    """
+    Returns the UTC offset of the local timezone (as used by
+    datetime.fromtimestamp) at each of the given epoch seconds. Offsets are
+    looked up once per distinct hour, and per value only within hours that
+    contain a daylight saving transition.
+    """
+    import numpy as np
+
+    hours, inverse = np.unique(seconds // 3600 * 3600, return_inverse=True)
+    start = np.array([time.localtime(int(hour)).tm_gmtoff for hour in hours], dtype="int64")
+    end = np.array([time.localtime(int(hour) + 3599).tm_gmtoff for hour in hours], dtype="int64")
+    offsets = start[inverse.ravel()]
+    changing = (start != end)[inverse.ravel()]
+    offsets[changing] = [time.localtime(int(value)).tm_gmtoff for value in seconds[changing]]
+    return offsets
+
+
+def convert_milli_to_timestamps(times_milli, tz: str = None):
+    """
+    Vectorized convert_milli_to_timestamp for numpy arrays, lists or
+    Series of epoch milliseconds. Like the scalar version, timestamps are
+    floored to whole seconds.
+
+    @tz: None returns naive timestamps in the local timezone (exactly like
+         convert_milli_to_timestamp); a timezone name (e.g. "UTC" or
+         "America/New_York") returns timezone-aware timestamps.
+
+    Returns a Series for Series input (keeping its index), else a DatetimeIndex.
+    Missing values become NaT.
+    """
+    import numpy as np
+    import pandas as pd
+
+    values = np.asarray(times_milli)
+    if values.dtype == object:
+        values = pd.to_numeric(values)
+    seconds = np.floor_divide(values, 1000)
+    if tz is None:
+        local = seconds.astype("float64")
+        valid = ~np.isnan(local)
+        local[valid] += _local_offsets(local[valid].astype("int64"))
+        return _as_datetimes(pd.to_datetime(local, unit="s"), times_milli)
+    stamps = pd.to_datetime(seconds, unit="s", utc=True).tz_convert(tz)
+    return _as_datetimes(stamps, times_milli)
+
+
+def convert_gmt_strings_to_timestamps(time_strs, tz: str = None):
+    """
+    Vectorized convert_gmt_string_to_timestamp for numpy arrays, lists or
+    Series of ISO 8601 GMT strings (e.g. '2022-06-01T21:34:00.0'). Like the
+    scalar version, the fractional seconds are dropped.
+
+    @tz: None returns naive timestamps (exactly like
+         convert_gmt_string_to_timestamp): a UTC offset is dropped and the
+         wall time kept. The scalar version keeps the offset of strings
+         without fractional seconds as a timezone-aware datetime, which a
+         single vector cannot hold for mixed offsets. A timezone name
+         returns timezone-aware timestamps converted to that timezone.
+
+    Returns a Series for Series input (keeping its index), else a DatetimeIndex.
+    Missing values become NaT.
+    """
+    import numpy as np
+    import pandas as pd
+
+    strings = pd.Series(np.asarray(time_strs, dtype=object))
+    # Only the fractional digits are dropped: a UTC offset after them is kept
+    whole_seconds = strings.str.replace(r"\.\d+", "", regex=True)
+    if tz is None:
+        wall_times = whole_seconds.str.replace(_UTC_OFFSET, r"\1", regex=True)
+        stamps = pd.DatetimeIndex(pd.to_datetime(wall_times, format="ISO8601"))
+    else:
+        stamps = pd.DatetimeIndex(pd.to_datetime(whole_seconds, format="ISO8601", utc=True))
+        stamps = stamps.tz_convert(tz)
+    return _as_datetimes(stamps, time_strs)
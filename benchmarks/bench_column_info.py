@@ -0,0 +1,110 @@
+"""
+Benchmarks EDA.get_column_info against its previous row-wise implementation
+on a wide frame and checks that both return identical output.
+
+Usage:
+
+python benchmarks/bench_column_info.py --rows 100000 --columns 500
+"""
+import argparse
+import os
+import sys
+import time
+
+# Benchmark the checked-out tree rather than an installed copy of DBToolBox
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from DBToolBox import EDA
+
+
+def legacy_get_column_info(df: pd.DataFrame) -> pd.DataFrame:
+    """The row-wise apply implementation that get_column_info replaced"""
+
+    def cardinality_rating(row):
+        """Assigns a cardinality rating based on the cardinality"""
+        return "HIGH" if row["cardinality"] > 19 else "LOW"
+
+    def variable_type(row):
+        """Determines if a given column is a Categorical or Numeric variable"""
+        return "Categorical" if row["dtype"] == "object" else "Numeric"
+
+    def cardinality_pct(row):
+        """Determines the percentage of rows that the given cardinality represents"""
+        return round(row["cardinality"] / df.shape[0], 4)
+
+    def null_count(row):
+        """Determines the number of null values for a column"""
+        return df[row["column_name"]].isnull().sum()
+
+    def null_pct(row):
+        """Determines the pct of null values for a column"""
+        return round(df[row["column_name"]].isnull().sum() / df.shape[0], 4)
+
+    # Build the Dataframe
+    cardinality_df = pd.DataFrame(
+        {"column_name": df.columns, "cardinality": df.nunique(), "dtype": df.dtypes}
+    )
+    cardinality_df["cardinality_rating"] = cardinality_df.apply(
+        cardinality_rating, axis=1
+    )
+    cardinality_df["variable_type"] = cardinality_df.apply(variable_type, axis=1)
+    cardinality_df["cardinality_pct"] = cardinality_df.apply(cardinality_pct, axis=1)
+    cardinality_df["nulls"] = cardinality_df.apply(null_count, axis=1)
+    cardinality_df["null_pct"] = cardinality_df.apply(null_pct, axis=1)
+    cardinality_df.reset_index(inplace=True)
+    cardinality_df.drop(columns="index", inplace=True)
+    return cardinality_df
+
+
+def make_wide_frame(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    """Builds a frame with a mix of integer, float (with nulls) and text columns"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        kind = i % 4
+        if kind == 0:
+            data[f"int_{i}"] = rng.integers(0, 1000, rows)
+        elif kind == 1:
+            values = rng.random(rows)
+            values[rng.random(rows) < 0.05] = np.nan
+            data[f"float_{i}"] = values
+        elif kind == 2:
+            data[f"flag_{i}"] = rng.integers(0, 5, rows)
+        else:
+            data[f"text_{i}"] = rng.choice(["a", "b", "c", None], rows)
+    return pd.DataFrame(data)
+
+
+def best_time(func, df: pd.DataFrame, repeat: int) -> float:
+    """Returns the best wall-clock time of @repeat runs in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(rows: int, columns: int, repeat: int) -> dict:
+    df = make_wide_frame(rows, columns)
+    pd.testing.assert_frame_equal(legacy_get_column_info(df), EDA.get_column_info(df))
+    legacy = best_time(legacy_get_column_info, df, repeat)
+    current = best_time(EDA.get_column_info, df, repeat)
+    return {
+        "rows": rows,
+        "columns": columns,
+        "legacy_s": round(legacy, 4),
+        "vectorized_s": round(current, 4),
+        "speedup": round(legacy / current, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(run(args.rows, args.columns, args.repeat))
@@ -0,0 +1,65 @@
+"""
+Measures the cold import time of the DBToolBox modules, each in a fresh
+interpreter, and lists the heavy dependencies every import pulls in.
+
+Usage:
+
+python benchmarks/bench_import_time.py --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# The modules are imported from the checked-out tree, not an installed copy
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "DBToolBox.bulk",
+    "DBToolBox.utils",
+    "DBToolBox.DataConnectors",
+    "DBToolBox.EDA",
+    "DBToolBox.DBConnector",
+]
+HEAVY_DEPENDENCIES = ["pandas", "sqlalchemy", "psycopg2", "matplotlib"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Imports @module in a fresh interpreter and returns its timing"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_DEPENDENCIES)],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat: int) -> dict:
+    results = {}
+    for module in MODULES:
+        runs = [measure(module) for _ in range(repeat)]
+        results[module] = {
+            "best_ms": round(min(run["seconds"] for run in runs) * 1000, 1),
+            "loaded": runs[0]["loaded"],
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for module, result in run(args.repeat).items():
+        loaded = ", ".join(result["loaded"]) or "-"
+        print(f"{module:<26} {result['best_ms']:>8.1f} ms   loads: {loaded}")
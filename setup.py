@@ -7,10 +7,14 @@ setup(
     author_email = 'martinm.arroyo7@gmail.com',
     packages = ['DBToolBox'],
     install_requires = [
-        'pandas',
+        'pandas>=2.0',
         'python-dotenv',
         'psycopg2-binary',
         'SQLAlchemy',
         'pytest'
-    ]
+    ],
+    extras_require = {
+        'async': ['SQLAlchemy[asyncio]', 'asyncpg', 'aiosqlite'],
+        'parquet': ['pyarrow']
+    }
 )
\ No newline at end of file